@@ -0,0 +1,88 @@
+"""Import time benchmark of the core modules (the ones loaded by solver workers and scripts).
+
+Each module is imported in a fresh interpreter with -X importtime. The benchmark fails when a module imports one of
+the heavy modules that should stay out of the core path (plotting, calibration, ODE integration) or when its import
+takes longer than the budget.
+
+Usage: python benchmarks/import_time.py [--budget-ms 500] [--repeat 3]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+PROJECT_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CORE_MODULES = [
+    "mdp.policy",
+    "mdp.policy_lookup",
+    "mdp.algorithms.value_iteration",
+    "mdp.algorithms.lrtdp",
+    "mdp.algorithms.lrtdp_simulator",
+    "mdp.algorithms.sweep",
+    "mdp.algorithms.parallel_lrtdp",
+    "sir_modelling.base_model",
+    "sir_modelling.enumerative_model",
+    "sir_modelling.enumerative_model_simulation",
+    "sir_modelling.streaming_model",
+    "sir_modelling.sweep_runner",
+    "seir_modelling.seir",
+    "seir_modelling.simulator",
+]
+
+FORBIDDEN_MODULES = [
+    "matplotlib",
+    "scipy.optimize",
+    "scipy.integrate",
+]
+
+def import_module(module):
+    check_forbidden = (
+        f"import sys, {module}; "
+        f"print(','.join(name for name in {FORBIDDEN_MODULES!r} if name in sys.modules))"
+    )
+
+    environment = dict(os.environ, PYTHONPATH=PROJECT_DIRECTORY)
+    process = subprocess.run(
+        [ sys.executable, "-X", "importtime", "-c", check_forbidden ],
+        cwd=PROJECT_DIRECTORY, env=environment, capture_output=True, text=True, check=True
+    )
+
+    # last line of -X importtime output is the requested module, with its cumulative time in microseconds
+    import_lines = [ line for line in process.stderr.splitlines() if line.startswith("import time:") ]
+    cumulative_microseconds = int(import_lines[-1].split("|")[1])
+
+    forbidden = [ name for name in process.stdout.strip().split(",") if name ]
+
+    return cumulative_microseconds / 1000.0, forbidden
+
+def main():
+    parser = argparse.ArgumentParser(description="Import time benchmark of the core modules")
+    parser.add_argument("--budget-ms", type=float, default=500.0, help="maximum import time of each module")
+    parser.add_argument("--repeat", type=int, default=3, help="number of imports of each module (best one is kept)")
+    arguments = parser.parse_args()
+
+    failures = []
+
+    for module in CORE_MODULES:
+        results = [ import_module(module) for _ in range(arguments.repeat) ]
+
+        elapsed_time = min(result[0] for result in results)
+        forbidden = results[0][1]
+
+        print(f"{module:45s} {elapsed_time:8.1f} ms" + (f"  imports {', '.join(forbidden)}" if forbidden else ""))
+
+        if forbidden:
+            failures.append(f"{module} imports {', '.join(forbidden)}")
+        if elapsed_time > arguments.budget_ms:
+            failures.append(f"{module} takes {elapsed_time:0.1f} ms to import (budget: {arguments.budget_ms:0.1f} ms)")
+
+    if failures:
+        print()
+        for failure in failures:
+            print(f"FAIL: {failure}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
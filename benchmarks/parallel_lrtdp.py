@@ -0,0 +1,61 @@
+"""Worker count benchmark of the parallel LRTDP.
+
+Solves the SIR enumerative mdp from several initial states with enumerative_parallel_lrtdp for each worker count, and
+reports the wall time, trials and Bellman backups of each run next to the sequential enumerative_lrtdp (one run per
+initial state). The speedup depends on the CPUs available: with a single CPU the workers only add overhead.
+
+Usage: PYTHONPATH=. python benchmarks/parallel_lrtdp.py [--approximation-threshold 0.02] [--workers 1 2 4] [--repeat 3]
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+
+from mdp.algorithms.lrtdp import enumerative_lrtdp
+from mdp.algorithms.parallel_lrtdp import enumerative_parallel_lrtdp
+from sir_modelling.enumerative_model import create_representation
+
+def main():
+    parser = argparse.ArgumentParser(description="Worker count benchmark of the parallel LRTDP")
+    parser.add_argument("--approximation-threshold", type=float, default=0.02, help="approximation threshold of the mdp")
+    parser.add_argument("--gamma", type=float, default=0.9, help="discount factor")
+    parser.add_argument("--epsilon", type=float, default=0.01, help="maximum residual of the solved states")
+    parser.add_argument("--initial-states", type=int, default=8, help="number of initial states, sampled from the mdp")
+    parser.add_argument("--workers", type=int, nargs="+", default=[ 1, 2, 4 ], help="worker counts to be measured")
+    parser.add_argument("--repeat", type=int, default=3, help="number of runs of each worker count (best one is kept)")
+    arguments = parser.parse_args()
+
+    mdp = create_representation(arguments.approximation_threshold, 0.25, [ 0.5, 1.0, 2.5, 4 ])
+
+    goal_states = [ state for state in mdp.states if "_i_0_" in state ]
+    candidate_states = [ state for state in mdp.states if state not in goal_states ]
+    initial_states = list(np.random.default_rng(0).choice(candidate_states, size=arguments.initial_states, replace=False))
+
+    print(f"{len(mdp.states)} states, {len(initial_states)} initial states, {os.cpu_count()} CPUs")
+
+    start_time = time.perf_counter()
+    bellman_backups_done = 0
+    for initial_state in initial_states:
+        _, _, statistics = enumerative_lrtdp(mdp, arguments.gamma, 100, arguments.epsilon, initial_state, goal_states, seed=0)
+        bellman_backups_done = bellman_backups_done + statistics["bellman_backups_done"]
+
+    print(f"{'sequential':12s} {time.perf_counter() - start_time:8.2f} s {'':>8s} {bellman_backups_done:10d} backups")
+
+    for workers in arguments.workers:
+        results = []
+
+        for _ in range(arguments.repeat):
+            start_time = time.perf_counter()
+            _, _, statistics = enumerative_parallel_lrtdp(mdp, arguments.gamma, 100, arguments.epsilon, initial_states,
+                                                          goal_states, workers=workers, seed=0)
+            results.append(( time.perf_counter() - start_time, statistics ))
+
+        elapsed_time, statistics = min(results, key=lambda result: result[0])
+
+        print(f"{workers:3d} workers  {elapsed_time:8.2f} s {statistics['iterations']:8d} trials"
+              f" {statistics['bellman_backups_done']:10d} backups")
+
+if __name__ == "__main__":
+    main()
@@ -3,16 +3,19 @@
 
 import numpy as np
 
+from mdp.policy import Policy
+from mdp.algorithms.value_iteration import compute_qualities, enumerative_value_iteration, get_successors
+
 def compute_maximum_residual(mdp, first_value_function, second_value_function):
     state_residual = lambda state: abs(first_value_function[state] - second_value_function[state])
     residuals = map(state_residual, mdp.states)
     return max(residuals)
 
 def compute_quality(state_index, action, mdp, gamma, value_function):
-    transition_matrix = mdp.transition_matrix(action)
     reward_matrix = mdp.reward_matrix(action)
 
-    pondered_sum = transition_matrix[state_index].dot(value_function)
+    indexes, probabilities = get_successors(mdp, state_index, action)
+    pondered_sum = probabilities.dot(value_function[indexes])
 
     return reward_matrix[state_index, 0] + gamma * pondered_sum
 
@@ -42,12 +45,13 @@ def compute_greedy_action(state_index, mdp, gamma, value_function):
     return best_action
 
 def compute_policy(mdp, gamma, value_function):
-    policy = {}
+    action_indexes = np.zeros(len(mdp.states), dtype=int)
 
     for state_index, state_name in enumerate(mdp.states):
-        policy[state_name] = compute_greedy_action(state_index, mdp, gamma, value_function)
+        action = compute_greedy_action(state_index, mdp, gamma, value_function)
+        action_indexes[state_index] = mdp.actions.index(action)
 
-    return policy
+    return Policy(mdp.states, mdp.actions, action_indexes, value_function)
 
 def residual(state_index, mdp, gamma, value_function):
     action = compute_greedy_action(state_index, mdp, gamma, value_function)
@@ -56,29 +60,16 @@ def residual(state_index, mdp, gamma, value_function):
     return abs(value_function[state_index] - quality)
 
 def reachable_states(mdp, state_index, action):
-    state_indexes = []
-
-    transition_matrix = mdp.transition_matrix(action)
-
-    indexes = np.nonzero(transition_matrix[state_index,:] > 0)
-
-    for next_state_index in indexes:
-        state_indexes.append(next_state_index[0])
-
-    return state_indexes
+    indexes, probabilities = get_successors(mdp, state_index, action)
+    return list(indexes)
 
 def sample_state(mdp, state_index, action):
     sampled_probability = np.random.random_sample()
     cummulative_probability = 0.0
 
-    transition_matrix = mdp.transition_matrix(action)
+    indexes, probabilities = get_successors(mdp, state_index, action)
 
-    indexes = np.nonzero(transition_matrix[state_index,:] > 0)
-
-    for next_state_index in indexes:
-        index = next_state_index[0]
-
-        probability = transition_matrix[state_index, index]
+    for index, probability in zip(indexes, probabilities):
         cummulative_probability = cummulative_probability + probability
         if sampled_probability < cummulative_probability:
             return index
@@ -124,7 +115,8 @@ def check_solved(root_state_index, epsilon, solved_states, mdp, gamma, value_fun
 
     return solved, bellman_backups_done
 
-def enumerative_lrtdp(mdp, gamma, max_depth, epsilon, initial_state, goal_states, seed = None):
+def enumerative_lrtdp(mdp, gamma, max_depth, epsilon, initial_state, goal_states, seed = None,
+                      initial_value_function = None, initial_solved_states = None):
     """Executes the Labeled Real Time Dynamic Programming algorithm.
     Parameters:
     mdp (EnumerativeMDP): enumerative Markov Decison Problem to be solved
@@ -134,23 +126,35 @@ def enumerative_lrtdp(mdp, gamma, max_depth, epsilon, initial_state, goal_states
     initial_state (string): MDP initial state
     goal_states (list of string): MDP goal states
     seed (int): optional seed used to initialize random number generator
+    initial_value_function (list): optional value function used to warm start the algorithm (e.g. the value function
+                                   found for a neighbouring configuration of a parameter sweep), represented as list
+                                   with values w.r.t mdp.states. Zeros are used when it is not informed
+    initial_solved_states (list of string): optional states already labeled as solved. Only pass labels found for this
+                                            same mdp and gamma (e.g. to resume an interrupted execution), since labels
+                                            from other configurations do not hold the epsilon guarantee
     Returns:
-    policy (dict): resulting policy computed for a mdp, represented as a dict that maps a state to an action
+    policy (Policy): resulting policy computed for a mdp, that maps a state to an action (see mdp.policy.Policy)
     value_function (list): value function found by this algorithm, represented as list with values w.r.t mdp.states
     statistics (dict): dictionary containing some statistics about the algorithm execution. We have three statistics here:
                       "iterations" that is equal to the horizon parameter, "bellman_backups_done" that is the overall
-                      number of Bellman backups executed and "maximum_residuals" that is the maximum residual found in
-                      each iteration.
+                      number of Bellman backups executed, "maximum_residuals" that is the maximum residual found in
+                      each iteration and "solved_states" that are the states labeled as solved.
     """
     if seed is not None:
         np.random.seed(seed)
 
-    value_function = np.zeros(( len(mdp.states), 1 ))
+    if initial_value_function is None:
+        value_function = np.zeros(( len(mdp.states), 1 ))
+    else:
+        value_function = np.array(initial_value_function, dtype=float).reshape(( len(mdp.states), 1 ))
 
     goal_state_indexes = list(map(lambda goal_state: mdp.states.index(goal_state), goal_states))
     initial_state_index = mdp.states.index(initial_state)
 
     solved_states = []
+    if initial_solved_states is not None:
+        solved_states = list(map(lambda solved_state: mdp.states.index(solved_state), initial_solved_states))
+
     bellman_backups_done = 0
     trials = 0
     maximum_residuals = []
@@ -167,11 +171,11 @@ def enumerative_lrtdp(mdp, gamma, max_depth, epsilon, initial_state, goal_states
             if state_index in goal_state_indexes:
                 break
 
-            value_function[state] = compute_bellman_backup(state_index, mdp, gamma, value_function)
+            value_function[state_index] = compute_bellman_backup(state_index, mdp, gamma, value_function)
             bellman_backups_done = bellman_backups_done + 1
 
             next_action = compute_greedy_action(state_index, mdp, gamma, value_function)
-            state = sample_state(mdp, state_index, next_action)
+            state_index = sample_state(mdp, state_index, next_action)
 
             if len(visited_states) > max_depth:
                 break
@@ -194,7 +198,147 @@ def enumerative_lrtdp(mdp, gamma, max_depth, epsilon, initial_state, goal_states
     statistics = {
         "iterations": trials,
         "bellman_backups_done": bellman_backups_done,
-        "maximum_residuals": maximum_residuals
+        "maximum_residuals": maximum_residuals,
+        "solved_states": list(map(lambda state_index: mdp.states[state_index], solved_states))
     }
 
     return policy, value_function, statistics
+
+def get_reachable_states(mdp, initial_state_indexes):
+    """Returns the sorted indexes of the states reachable from the initial states with any sequence of actions."""
+    reachable_state_indexes = set(initial_state_indexes)
+    open_states = list(initial_state_indexes)
+
+    while len(open_states) != 0:
+        state_index = open_states.pop()
+
+        for action in mdp.actions:
+            for next_state_index in map(int, reachable_states(mdp, state_index, action)):
+                if next_state_index not in reachable_state_indexes:
+                    reachable_state_indexes.add(next_state_index)
+                    open_states.append(next_state_index)
+
+    return np.array(sorted(reachable_state_indexes), dtype=np.int64)
+
+def restrict_mdp(mdp, state_indexes):
+    """Returns the mdp restricted to a set of states closed under its transitions (e.g. found with
+    get_reachable_states), whose states follow the order of state_indexes."""
+    transition_matrices = {}
+    reward_matrices = {}
+
+    for action in mdp.actions:
+        transition_matrices[action] = mdp.transition_matrix(action)[state_indexes][:, state_indexes]
+        reward_matrices[action] = mdp.reward_matrix(action)[state_indexes]
+
+    return mdp._replace(
+        states = list(map(lambda state_index: mdp.states[state_index], state_indexes)),
+        transition_matrix = lambda action: transition_matrices[action],
+        reward_matrix = lambda action: reward_matrices[action]
+    )
+
+def compute_heuristic(mdp, gamma, value_function, goal_state_indexes, heuristic_backups = 0, admissible = True,
+                      bound_backups = 20):
+    """Turns a value function estimate into a heuristic for LRTDP. When admissible is True the estimate becomes an
+    upper bound of the optimal value function (see raise_to_upper_bound). The heuristic is then tightened with
+    heuristic_backups vectorized Bellman backups (each backup of an upper bound is still an upper bound, closer to the
+    optimal value function)."""
+    heuristic = np.array(value_function, dtype=float).reshape(( len(mdp.states), 1 ))
+    heuristic[goal_state_indexes] = 0.0
+    bellman_backups_done = 0
+
+    if admissible:
+        heuristic, bellman_backups_done = raise_to_upper_bound(mdp, gamma, heuristic, goal_state_indexes, bound_backups)
+
+    for _ in range(heuristic_backups):
+        heuristic = compute_qualities(mdp, gamma, heuristic).max(axis=0).reshape(( len(mdp.states), 1 ))
+        heuristic[goal_state_indexes] = 0.0
+        bellman_backups_done = bellman_backups_done + len(mdp.states)
+
+    return heuristic, bellman_backups_done
+
+def raise_to_upper_bound(mdp, gamma, heuristic, goal_state_indexes, bound_backups):
+    """Turns a heuristic into an upper bound h of the optimal value function, which holds when h >= T h. States below
+    their backup are first raised to it (h = max(h, T h)) for up to bound_backups vectorized backups, which fixes them
+    locally, and only the remaining violation is spread over every state as the smallest constant c such that
+    h + c >= T(h + c), that is c = max(T h - h) / (1 - gamma). A single global shift of the raw estimate would be set
+    by its worst interpolation error and be looser than a trivial bound."""
+    if gamma >= 1.0:
+        raise ValueError("admissible heuristics from value function estimates require gamma < 1")
+
+    bellman_backups_done = 0
+
+    for iteration in range(bound_backups + 1):
+        backup = compute_qualities(mdp, gamma, heuristic).max(axis=0).reshape(( len(mdp.states), 1 ))
+        backup[goal_state_indexes] = 0.0
+        bellman_backups_done = bellman_backups_done + len(mdp.states)
+
+        violation = max(np.max(backup - heuristic), 0.0)
+        if violation == 0.0 or iteration == bound_backups:
+            break
+
+        heuristic = np.maximum(heuristic, backup)
+
+    heuristic = heuristic + violation / (1.0 - gamma)
+    heuristic[goal_state_indexes] = 0.0
+
+    return heuristic, bellman_backups_done
+
+def enumerative_multi_resolution_lrtdp(mdp, coarse_mdp, interpolate_value_function, gamma, max_depth, epsilon,
+                                       initial_state, goal_states, seed = None, heuristic_backups = 0, admissible = True,
+                                       bound_backups = 15, coarse_value_function = None):
+    """Executes the Labeled Real Time Dynamic Programming algorithm using as heuristic the value function of a coarse
+    version of the same problem, solved with vectorized Value Iteration and interpolated onto the states of the mdp.
+    The heuristic is only raised and tightened over the states reachable from the initial state, since LRTDP never
+    visits the others.
+    Parameters:
+    mdp (EnumerativeMDP): enumerative Markov Decison Problem to be solved
+    coarse_mdp (EnumerativeMDP): coarse version of the mdp (e.g. built with a larger approximation_threshold)
+    interpolate_value_function (function): function that receives the coarse mdp, its value function and the mdp and
+                                           returns the value function w.r.t mdp.states (for SIR enumerative models use
+                                           sir_modelling.enumerative_model.interpolate_value_function)
+    gamma (float): discount factor applied to solve this MDP (should be lower than 1)
+    max_depth (int): max depth to search (used to avoid infinite loops on deadends)
+    epsilon (float): maximum residual allowed between V_k and V_{k+1}
+    initial_state (string): MDP initial state
+    goal_states (list of string): MDP goal states
+    seed (int): optional seed used to initialize random number generator
+    heuristic_backups (int): number of vectorized Bellman backups used to tighten the heuristic before running LRTDP
+    admissible (bool): when True (default) the interpolated value function is raised to an upper bound of the optimal
+                       value function (see raise_to_upper_bound), keeping the LRTDP optimality guarantee. When False it
+                       is used as is, which gives no guarantee: LRTDP may label states as solved with values far from
+                       the optimal ones
+    bound_backups (int): maximum number of vectorized Bellman backups used to raise the heuristic to an upper bound
+    coarse_value_function (list): optional value function of the coarse mdp (e.g. shared by the executions from several
+                                  initial states), which is solved with enumerative_value_iteration when not informed
+    Returns:
+    policy (Policy): resulting policy computed for a mdp, that maps a state to an action (see mdp.policy.Policy)
+    value_function (list): value function found by this algorithm, represented as list with values w.r.t mdp.states
+    statistics (dict): the same statistics of enumerative_lrtdp, plus "coarse_bellman_backups_done" and
+                       "heuristic_bellman_backups_done" that are the Bellman backups executed to solve the coarse mdp
+                       (zero when coarse_value_function is informed) and to compute the heuristic.
+    """
+    coarse_bellman_backups_done = 0
+    if coarse_value_function is None:
+        _, coarse_value_function, coarse_statistics = enumerative_value_iteration(coarse_mdp, gamma, epsilon)
+        coarse_bellman_backups_done = coarse_statistics["bellman_backups_done"]
+
+    goal_state_indexes = list(map(lambda goal_state: mdp.states.index(goal_state), goal_states))
+
+    heuristic = np.array(interpolate_value_function(coarse_mdp, coarse_value_function, mdp), dtype=float).reshape(( len(mdp.states), 1 ))
+    heuristic[goal_state_indexes] = 0.0
+
+    # the reachable states are closed under the transitions, so an upper bound over them is enough for LRTDP
+    reachable_state_indexes = get_reachable_states(mdp, [ mdp.states.index(initial_state) ])
+    reachable_goal_state_indexes = np.flatnonzero(np.isin(reachable_state_indexes, goal_state_indexes))
+
+    heuristic[reachable_state_indexes], heuristic_bellman_backups_done = compute_heuristic(
+        restrict_mdp(mdp, reachable_state_indexes), gamma, heuristic[reachable_state_indexes], reachable_goal_state_indexes,
+        heuristic_backups, admissible, bound_backups
+    )
+
+    policy, value_function, statistics = enumerative_lrtdp(mdp, gamma, max_depth, epsilon, initial_state, goal_states, seed, initial_value_function=heuristic)
+
+    statistics["coarse_bellman_backups_done"] = coarse_bellman_backups_done
+    statistics["heuristic_bellman_backups_done"] = heuristic_bellman_backups_done
+
+    return policy, value_function, statistics
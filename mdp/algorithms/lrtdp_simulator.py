@@ -1,5 +1,7 @@
 import numpy as np
 
+from mdp.policy import Policy
+
 def discretize_state(state, truncate_digits = 4):
     values = []
     for state_value in state:
@@ -11,6 +13,12 @@ def recreate_state(discretized_state, truncate_digits = 4):
     splitted_state = discretized_state.split("_")
     return list(map(lambda item: int(item) / (10 ** truncate_digits), splitted_state))
 
+def get_state_lattice_points(discretized_states, truncate_digits = 4):
+    """Returns an int array with the grid coordinates of discretized states, together with the grid precision, e.g.
+    to query a policy with mdp.policy_lookup.PolicyLookup(policy, points, precision, snap=truncate_points)."""
+    points = np.array(list(map(lambda state: list(map(int, state.split("_"))), discretized_states)), dtype=np.int64)
+    return points, 10 ** truncate_digits
+
 def is_goal(discretized_state, simulator):
     state = recreate_state(discretized_state)
     return simulator.is_goal(state)
@@ -52,7 +60,7 @@ def compute_policy(simulator, gamma, value_function):
     for state in value_function.keys():
         policy[state] = compute_greedy_action(state, simulator, gamma, value_function)
 
-    return policy
+    return Policy.from_dict(policy, simulator.actions, value_function)
 
 def residual(state, simulator, gamma, value_function):
     action = compute_greedy_action(state, simulator, gamma, value_function)
@@ -99,10 +107,14 @@ def check_solved(root_state, epsilon, solved_states, simulator, gamma, value_fun
 
     return solved, bellman_backups_done
 
-def enumerative_lrtdp_with_simulator(simulator, gamma, max_depth, epsilon):
+def enumerative_lrtdp_with_simulator(simulator, gamma, max_depth, epsilon, initial_value_function = None, initial_solved_states = None):
     value_function = {}
+    if initial_value_function is not None:
+        value_function.update(initial_value_function)
 
     solved_states = []
+    if initial_solved_states is not None:
+        solved_states.extend(initial_solved_states)
     bellman_backups_done = 0
     trials = 0
     maximum_residuals = []
@@ -148,7 +160,8 @@ def enumerative_lrtdp_with_simulator(simulator, gamma, max_depth, epsilon):
     statistics = {
         "iterations": trials,
         "bellman_backups_done": bellman_backups_done,
-        "maximum_residuals": maximum_residuals
+        "maximum_residuals": maximum_residuals,
+        "solved_states": solved_states
     }
 
     return policy, value_function, statistics
@@ -0,0 +1,224 @@
+from multiprocessing import shared_memory
+
+import multiprocessing
+import os
+import queue
+
+import numpy as np
+
+from mdp.algorithms.lrtdp import check_solved, compute_bellman_backup, compute_greedy_action, compute_policy, enumerative_lrtdp, sample_state
+
+class SharedLabels:
+    """Solved labels kept in a shared uint8 array indexed by state id. It has the part of the list interface used by
+    check_solved, so the sequential LRTDP functions can be reused by the workers."""
+
+    def __init__(self, labels):
+        self.labels = labels
+
+    def __contains__(self, state_index):
+        return self.labels[state_index] != 0
+
+    def append(self, state_index):
+        self.labels[state_index] = 1
+
+def create_shared_array(shape, dtype):
+    dtype = np.dtype(dtype)
+    size = int(np.prod(shape)) * dtype.itemsize
+
+    memory = shared_memory.SharedMemory(create=True, size=max(size, 1))
+
+    array = np.ndarray(shape, dtype=dtype, buffer=memory.buf)
+    array.fill(0)
+
+    return memory, array
+
+def run_trials(worker_index, mdp, gamma, max_depth, epsilon, initial_state_indexes, goal_state_indexes, seed,
+               value_function, labels, statistics_queue):
+    """Runs LRTDP trials until every initial state is labeled as solved. Value function and labels are shared with the
+    other workers and updated without locks: a lost update only costs extra backups, and the result is verified by
+    the parent process afterwards."""
+    if seed is not None:
+        np.random.seed(seed + worker_index)
+
+    solved_states = SharedLabels(labels)
+
+    bellman_backups_done = 0
+    trials = 0
+
+    while True:
+        unsolved_initial_states = [ state_index for state_index in initial_state_indexes if state_index not in solved_states ]
+        if len(unsolved_initial_states) == 0:
+            break
+
+        # workers start from different initial states when there are several of them
+        initial_state_index = unsolved_initial_states[(worker_index + trials) % len(unsolved_initial_states)]
+
+        trials = trials + 1
+        visited_states = []
+
+        state_index = initial_state_index
+
+        while (state_index not in solved_states):
+            visited_states.append(state_index)
+
+            if state_index in goal_state_indexes:
+                break
+
+            value_function[state_index] = compute_bellman_backup(state_index, mdp, gamma, value_function)
+            bellman_backups_done = bellman_backups_done + 1
+
+            next_action = compute_greedy_action(state_index, mdp, gamma, value_function)
+            state_index = sample_state(mdp, state_index, next_action)
+
+            if len(visited_states) > max_depth:
+                break
+
+        while len(visited_states) != 0:
+            state_index = visited_states.pop()
+
+            solved, bellman_backups = check_solved(state_index, epsilon, solved_states, mdp, gamma, value_function)
+            bellman_backups_done = bellman_backups_done + bellman_backups
+
+            if not solved:
+                break
+
+    statistics_queue.put((trials, bellman_backups_done))
+
+def collect_worker_statistics(processes, statistics_queue, poll_interval = 0.1):
+    """Waits for the statistics of every worker, raising a RuntimeError as soon as one of them exits with an error
+    (e.g. an exception raised by the mdp functions), since the others would never label its states as solved."""
+    worker_statistics = []
+
+    while len(worker_statistics) != len(processes):
+        try:
+            worker_statistics.append(statistics_queue.get(timeout=poll_interval))
+        except queue.Empty:
+            for worker_index, process in enumerate(processes):
+                if process.exitcode is not None and process.exitcode != 0:
+                    raise RuntimeError(f"LRTDP worker {worker_index} exited with code {process.exitcode}")
+
+    return worker_statistics
+
+def verify_labels(mdp, gamma, max_depth, epsilon, initial_states, goal_states, seed, value_function):
+    """Verifies the labels found by the workers with check_solved from each initial state with no solved labels, which
+    only backs up the greedy envelope of the shared value function. Initial states that fail it are solved with a
+    sequential LRTDP warm started with the value function."""
+    solved_states = []
+    unsolved_initial_states = []
+    bellman_backups_done = 0
+
+    for initial_state in initial_states:
+        solved, bellman_backups = check_solved(mdp.states.index(initial_state), epsilon, solved_states, mdp, gamma, value_function)
+        bellman_backups_done = bellman_backups_done + bellman_backups
+
+        if not solved:
+            unsolved_initial_states.append(initial_state)
+
+    solved_states = list(map(lambda state_index: mdp.states[state_index], solved_states))
+
+    for initial_state in unsolved_initial_states:
+        _, value_function, statistics = enumerative_lrtdp(
+            mdp, gamma, max_depth, epsilon, initial_state, goal_states, seed,
+            initial_value_function=value_function, initial_solved_states=solved_states
+        )
+
+        solved_states = statistics["solved_states"]
+        bellman_backups_done = bellman_backups_done + statistics["bellman_backups_done"]
+
+    return compute_policy(mdp, gamma, value_function), value_function, bellman_backups_done
+
+def enumerative_parallel_lrtdp(mdp, gamma, max_depth, epsilon, initial_states, goal_states, workers = None, seed = None,
+                               initial_value_function = None):
+    """Executes the Labeled Real Time Dynamic Programming algorithm with several worker processes running trials at
+    the same time. The value function and solved labels live in shared memory, indexed by state id. Once workers label
+    every initial state as solved, the parent process verifies the labels with check_solved from each initial state
+    (falling back to a sequential LRTDP warm started with the shared value function when it fails), so the result holds
+    the same epsilon guarantee of enumerative_lrtdp. A RuntimeError is raised if a worker fails.
+    Workers are forked processes (the mdp transition and reward functions are not picklable), so this function is
+    only available on platforms with the fork start method.
+    Parameters:
+    mdp (EnumerativeMDP): enumerative Markov Decison Problem to be solved
+    gamma (float): discount factor applied to solve this MDP (assumes infinite on indefinite horizon)
+    max_depth (int): max depth to search (used to avoid infinite loops on deadends)
+    epsilon (float): maximum residual allowed between V_k and V_{k+1}
+    initial_states (list of string): MDP initial states, trials of different workers start from different ones
+    goal_states (list of string): MDP goal states
+    workers (int): number of worker processes (defaults to the number of CPUs)
+    seed (int): optional seed used to initialize random number generator (each worker uses seed + worker index)
+    initial_value_function (list): optional value function used to warm start the algorithm, represented as list
+                                   with values w.r.t mdp.states. Zeros are used when it is not informed
+    Returns:
+    policy (Policy): resulting policy computed for a mdp, that maps a state to an action (see mdp.policy.Policy)
+    value_function (list): value function found by this algorithm, represented as list with values w.r.t mdp.states
+    statistics (dict): dictionary containing some statistics about the algorithm execution. We have four statistics
+                       here: "iterations" that is the number of trials done by all workers, "bellman_backups_done" that
+                       is the overall number of Bellman backups executed (including the verification),
+                       "verification_bellman_backups_done" that is the number of Bellman backups done in the
+                       verification and "workers" that is the number of worker processes.
+    """
+    if isinstance(initial_states, str):
+        initial_states = [ initial_states ]
+
+    if workers is None:
+        workers = os.cpu_count()
+
+    initial_state_indexes = list(map(lambda initial_state: mdp.states.index(initial_state), initial_states))
+    goal_state_indexes = set(map(lambda goal_state: mdp.states.index(goal_state), goal_states))
+
+    context = multiprocessing.get_context("fork")
+
+    value_function_memory, value_function = create_shared_array(( len(mdp.states), 1 ), np.float64)
+    labels_memory, labels = create_shared_array(( len(mdp.states), ), np.uint8)
+
+    processes = []
+
+    try:
+        if initial_value_function is not None:
+            value_function[:] = np.asarray(initial_value_function, dtype=float).reshape(( len(mdp.states), 1 ))
+
+        statistics_queue = context.Queue()
+
+        for worker_index in range(workers):
+            process = context.Process(
+                target=run_trials,
+                args=(worker_index, mdp, gamma, max_depth, epsilon, initial_state_indexes, goal_state_indexes, seed,
+                      value_function, labels, statistics_queue)
+            )
+            process.start()
+            processes.append(process)
+
+        worker_statistics = collect_worker_statistics(processes, statistics_queue)
+
+        for process in processes:
+            process.join()
+
+        shared_value_function = value_function.copy()
+    finally:
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+                process.join()
+
+        del value_function, labels
+
+        value_function_memory.close()
+        value_function_memory.unlink()
+        labels_memory.close()
+        labels_memory.unlink()
+
+    trials = sum(map(lambda item: item[0], worker_statistics))
+    bellman_backups_done = sum(map(lambda item: item[1], worker_statistics))
+
+    # verify labels found with lock free updates
+    policy, shared_value_function, verification_bellman_backups_done = verify_labels(
+        mdp, gamma, max_depth, epsilon, initial_states, goal_states, seed, shared_value_function
+    )
+
+    statistics = {
+        "iterations": trials,
+        "bellman_backups_done": bellman_backups_done + verification_bellman_backups_done,
+        "verification_bellman_backups_done": verification_bellman_backups_done,
+        "workers": workers
+    }
+
+    return policy, shared_value_function, statistics
@@ -0,0 +1,170 @@
+import numbers
+
+import numpy as np
+
+def parameter_distance(first_value, second_value, value_range):
+    if isinstance(first_value, numbers.Number) and isinstance(second_value, numbers.Number):
+        if value_range == 0:
+            return 0.0
+        return abs(first_value - second_value) / value_range
+
+    if isinstance(first_value, (list, tuple)) and isinstance(second_value, (list, tuple)):
+        first_set = set(first_value)
+        second_set = set(second_value)
+        return len(first_set ^ second_set) / max(len(first_set | second_set), 1)
+
+    return 0.0 if first_value == second_value else 1.0
+
+def get_parameter_ranges(configurations):
+    parameter_ranges = {}
+
+    for key in configurations[0].keys():
+        values = [ configuration[key] for configuration in configurations ]
+
+        if all(isinstance(value, numbers.Number) for value in values):
+            parameter_ranges[key] = max(values) - min(values)
+        else:
+            parameter_ranges[key] = None
+
+    return parameter_ranges
+
+def configuration_distance(first_configuration, second_configuration, parameter_ranges):
+    distance = 0.0
+
+    for key, value_range in parameter_ranges.items():
+        distance = distance + parameter_distance(first_configuration[key], second_configuration[key], value_range)
+
+    return distance
+
+def order_configurations(configurations, distance = None):
+    """Orders the configurations of a parameter sweep so that each one is followed by its nearest unvisited neighbour.
+    Parameters:
+    configurations (list of dict): configurations of the sweep, each one mapping a parameter name to its value
+    distance (function): optional function that receives two configurations and returns the distance between them.
+                         When it is not informed, numeric parameters are compared by their difference normalized by
+                         their range in the sweep, lists (e.g. betas) by their symmetric difference and any other value
+                         by equality
+    Returns:
+    order (list of int): indexes of the configurations in the order they should be solved
+    """
+    if len(configurations) == 0:
+        return []
+
+    if distance is None:
+        parameter_ranges = get_parameter_ranges(configurations)
+        distance = lambda first, second: configuration_distance(first, second, parameter_ranges)
+
+    order = [ 0 ]
+    unvisited = list(range(1, len(configurations)))
+
+    while len(unvisited) != 0:
+        last_configuration = configurations[order[-1]]
+
+        nearest = min(unvisited, key=lambda index: distance(last_configuration, configurations[index]))
+
+        unvisited.remove(nearest)
+        order.append(nearest)
+
+    return order
+
+def transfer_value_function(source_mdp, value_function, target_mdp, source_gamma = None, target_gamma = None,
+                            interpolate_value_function = None):
+    """Maps a value function found for an mdp onto the states of another one. When the states differ, the value function
+    is interpolated with interpolate_value_function if it is informed, otherwise states are matched by name and states
+    not found in the source mdp receive zero. When both discount factors are informed, values are rescaled by
+    (1 - source_gamma) / (1 - target_gamma), since they grow with the effective horizon 1 / (1 - gamma).
+    Parameters:
+    source_mdp (EnumerativeMDP): mdp where the value function was computed
+    value_function (list): value function represented as list with values w.r.t source_mdp.states
+    target_mdp (EnumerativeMDP): mdp that will receive the value function
+    source_gamma (float): optional discount factor used to compute the value function
+    target_gamma (float): optional discount factor used to solve the target mdp
+    interpolate_value_function (function): optional function that receives the source mdp, its value function and the
+                                           target mdp and returns the value function w.r.t target_mdp.states (e.g.
+                                           sir_modelling.enumerative_model.interpolate_value_function, for grids with
+                                           different approximation thresholds)
+    Returns:
+    value_function (list): value function represented as list with values w.r.t target_mdp.states
+    """
+    value_function = np.asarray(value_function, dtype=float).reshape(( len(source_mdp.states), 1 ))
+
+    if source_mdp.states == target_mdp.states:
+        target_value_function = value_function.copy()
+    elif interpolate_value_function is not None:
+        target_value_function = interpolate_value_function(source_mdp, value_function, target_mdp)
+        target_value_function = np.asarray(target_value_function, dtype=float).reshape(( len(target_mdp.states), 1 ))
+    else:
+        source_indexes = {}
+        for state_index, state_name in enumerate(source_mdp.states):
+            source_indexes[state_name] = state_index
+
+        target_value_function = np.zeros(( len(target_mdp.states), 1 ))
+
+        for state_index, state_name in enumerate(target_mdp.states):
+            source_index = source_indexes.get(state_name)
+            if source_index is not None:
+                target_value_function[state_index] = value_function[source_index]
+
+    if source_gamma is not None and target_gamma is not None:
+        target_value_function = target_value_function * (1 - source_gamma) / (1 - target_gamma)
+
+    return target_value_function
+
+def warm_started_sweep(configurations, build_mdp, solve, distance = None, interpolate_value_function = None,
+                       gamma_key = "gamma"):
+    """Solves every configuration of a parameter sweep, warm starting each solver execution with the value function
+    found for the previous (and nearest) configuration.
+    Parameters:
+    configurations (list of dict): configurations of the sweep, each one mapping a parameter name to its value
+    build_mdp (function): function that receives a configuration and returns its EnumerativeMDP
+    solve (function): function that receives a configuration, its mdp and an initial value function (None for the first
+                      configuration solved) and returns the solver results (policy, value_function, statistics), e.g.
+                      lambda configuration, mdp, initial_value_function: enumerative_value_iteration(
+                      mdp, configuration["gamma"], 0.001, initial_value_function). The solver must converge to the
+                      same result from any initial value function (as infinite horizon Value Iteration does), so
+                      finite horizon solvers, whose H-step values depend on starting from zeros, do not fit here
+    distance (function): optional distance between configurations, see order_configurations
+    interpolate_value_function (function): optional function used to transfer value functions between mdps with
+                                           different states, see transfer_value_function
+    gamma_key (string): parameter of the configurations with the discount factor, used to rescale the value functions
+                        transferred between configurations with different discount factors
+    Returns:
+    results (list of tuple): solver results (policy, value_function, statistics) w.r.t configurations
+    statistics (dict): dictionary containing some statistics about the sweep execution. We have two statistics here:
+                       "order" that is the order in which configurations were solved and "bellman_backups_done" that is
+                       the overall number of Bellman backups executed in the sweep.
+    """
+    order = order_configurations(configurations, distance)
+
+    results = [ None ] * len(configurations)
+    bellman_backups_done = 0
+
+    last_configuration = None
+    last_mdp = None
+    last_value_function = None
+
+    for configuration_index in order:
+        configuration = configurations[configuration_index]
+        mdp = build_mdp(configuration)
+
+        initial_value_function = None
+        if last_mdp is not None:
+            initial_value_function = transfer_value_function(last_mdp, last_value_function, mdp,
+                                                             last_configuration.get(gamma_key), configuration.get(gamma_key),
+                                                             interpolate_value_function)
+
+        policy, value_function, solver_statistics = solve(configuration, mdp, initial_value_function)
+        bellman_backups_done = bellman_backups_done + solver_statistics.get("bellman_backups_done", 0)
+
+        results[configuration_index] = (policy, value_function, solver_statistics)
+
+        last_configuration = configuration
+        last_mdp = mdp
+        last_value_function = value_function
+
+    statistics = {
+        "order": order,
+        "bellman_backups_done": bellman_backups_done
+    }
+
+    return results, statistics
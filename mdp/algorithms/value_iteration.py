@@ -1,10 +1,28 @@
+import os
+
 import numpy as np
 
-def compute_quality(state_index, action, mdp, gamma, value_function):
+from mdp.policy import NonStationaryPolicy, Policy, get_action_index_dtype
+
+def get_successors(mdp, state_index, action):
+    """Returns the indexes of the states reachable from a state with an action and their probabilities. Transition
+    matrices may be dense arrays or scipy.sparse CSR matrices (e.g. sir_modelling.stochastic_model)."""
     transition_matrix = mdp.transition_matrix(action)
+
+    if hasattr(transition_matrix, "indptr"):
+        start, stop = transition_matrix.indptr[state_index], transition_matrix.indptr[state_index + 1]
+        return transition_matrix.indices[start:stop], transition_matrix.data[start:stop]
+
+    probabilities = transition_matrix[state_index]
+    indexes = np.flatnonzero(probabilities > 0)
+
+    return indexes, probabilities[indexes]
+
+def compute_quality(state_index, action, mdp, gamma, value_function):
     reward_matrix = mdp.reward_matrix(action)
 
-    pondered_sum = transition_matrix[state_index].dot(value_function)
+    indexes, probabilities = get_successors(mdp, state_index, action)
+    pondered_sum = probabilities.dot(value_function[indexes])
 
     return reward_matrix[state_index, 0] + gamma * pondered_sum
 
@@ -19,52 +37,101 @@ def compute_bellman_backup(state_index, mdp, gamma, value_function):
     return max(qualities)
 
 def compute_policy(mdp, gamma, value_function):
-    policy = {}
+    action_indexes = np.zeros(len(mdp.states), dtype=int)
 
     for state_index, state_name in enumerate(mdp.states):
         max_value = float("-inf")
-        best_action = None
 
-        for action in mdp.actions:
+        for action_index, action in enumerate(mdp.actions):
             quality = compute_quality(state_index, action, mdp, gamma, value_function)
 
             if quality > max_value:
                 max_value = quality
-                best_action = action
+                action_indexes[state_index] = action_index
+
+    return Policy(mdp.states, mdp.actions, action_indexes, value_function)
+
+def compute_qualities(mdp, gamma, value_function):
+    """Computes the quality of every (action, state) pair at once, returning an array with shape (actions, states)."""
+    value_function = np.asarray(value_function, dtype=float).reshape(( len(mdp.states), 1 ))
+    qualities = np.zeros(( len(mdp.actions), len(mdp.states) ))
+
+    for action_index, action in enumerate(mdp.actions):
+        transition_matrix = mdp.transition_matrix(action)
+        reward_matrix = mdp.reward_matrix(action)
+
+        qualities[action_index] = reward_matrix[:, 0] + gamma * np.asarray(transition_matrix.dot(value_function)).ravel()
 
-        policy[state_name] = best_action
+    return qualities
 
-    return policy
+def compute_greedy_policy(mdp, qualities, value_function):
+    return Policy(mdp.states, mdp.actions, np.argmax(qualities, axis=0), value_function)
 
-def enumerative_finite_horizon_value_iteration(mdp, gamma, horizon):
+def compute_maximum_residual(first_value_function, second_value_function):
+    return np.max(np.abs(first_value_function - second_value_function))
+
+def create_table(directory, name, dtype, shape):
+    if directory is None:
+        return np.zeros(shape, dtype=dtype)
+
+    os.makedirs(directory, exist_ok=True)
+    return np.lib.format.open_memmap(os.path.join(directory, name), mode="w+", dtype=dtype, shape=shape)
+
+def enumerative_finite_horizon_value_iteration(mdp, gamma, horizon, non_stationary = False, value_dtype = None, directory = None):
     """Executes the Value Iteration algorithm for finite horizon MDPs.
     Parameters:
     mdp (EnumerativeMDP): enumerative Markov Decison Problem to be solved
     gamma (float): discount factor applied to solve this MDP
     horizon (int): number of steps that can be done in this MDP
+    non_stationary (bool): when True, returns a NonStationaryPolicy with the optimal action of each step, kept as an
+                           (horizon, states) action index table
+    value_dtype (numpy dtype): when informed with non_stationary, the value function of each step is also kept, as an
+                               (horizon, states) table of this dtype (e.g. np.float16 or np.float32)
+    directory (string): when informed with non_stationary, tables are memory mapped .npy files in this directory,
+                        written as each step finishes, instead of arrays in memory
     Returns:
-    policy (dict): resulting policy computed for a mdp, represented as a dict that maps a state to an action
+    policy (Policy or NonStationaryPolicy): resulting policy computed for a mdp, that maps a state to an action (see
+                                            mdp.policy)
     value_function (list): value function found by this algorithm, represented as list with values w.r.t mdp.states
     statistics (dict): dictionary containing some statistics about the algorithm execution. We have two statistics here:
                       "iterations" that is equal to the horizon parameter and "bellman_backups_done" that is the overall
                       number of Bellman backups executed.
     """
+    # the H-step values are only found starting from zeros, so this solver can not be warm started (use
+    # enumerative_value_iteration for that)
     last_horizon_value_function = np.zeros(( len(mdp.states), 1 ))
 
+    action_table = None
+    value_table = None
+
+    if non_stationary:
+        action_table = create_table(directory, "action_table.npy", get_action_index_dtype(len(mdp.actions)), ( horizon, len(mdp.states) ))
+        if value_dtype is not None:
+            value_table = create_table(directory, "value_table.npy", value_dtype, ( horizon, len(mdp.states) ))
+
     bellman_backups_done = 0
 
     for n in range(horizon - 1, -1, -1): # range from H - 1 to 0
-        current_horizon_value_function = np.zeros(( len(mdp.states), 1 ))
-
         # do bellman update
-        for state_index, state_name in enumerate(mdp.states):
-            current_horizon_value_function[state_index] = compute_bellman_backup(state_index, mdp, gamma, last_horizon_value_function)
-            bellman_backups_done = bellman_backups_done + 1
+        qualities = compute_qualities(mdp, gamma, last_horizon_value_function)
+        current_horizon_value_function = qualities.max(axis=0).reshape(( len(mdp.states), 1 ))
+        bellman_backups_done = bellman_backups_done + len(mdp.states)
+
+        if action_table is not None:
+            action_table[n] = np.argmax(qualities, axis=0)
+        if value_table is not None:
+            value_table[n] = current_horizon_value_function[:, 0]
 
         last_horizon_value_function = current_horizon_value_function
 
     # compute policy
-    policy = compute_policy(mdp, gamma, last_horizon_value_function)
+    if non_stationary:
+        policy = NonStationaryPolicy(mdp.states, mdp.actions, action_table, value_table)
+
+        if directory is not None:
+            policy.save(directory)
+    else:
+        policy = compute_policy(mdp, gamma, last_horizon_value_function)
 
     statistics = {
         "iterations": horizon,
@@ -72,3 +139,173 @@ def enumerative_finite_horizon_value_iteration(mdp, gamma, horizon):
     }
 
     return policy, last_horizon_value_function, statistics
+
+def enumerative_value_iteration(mdp, gamma, epsilon, initial_value_function = None, max_iterations = None):
+    """Executes the Value Iteration algorithm for infinite horizon MDPs, doing the Bellman backups of all states at
+    once as vectorized operations.
+    Parameters:
+    mdp (EnumerativeMDP): enumerative Markov Decison Problem to be solved
+    gamma (float): discount factor applied to solve this MDP
+    epsilon (float): maximum residual allowed between V_k and V_{k+1}
+    initial_value_function (list): optional value function used to warm start the algorithm, represented as list with
+                                   values w.r.t mdp.states. Zeros are used when it is not informed
+    max_iterations (int): optional maximum number of iterations
+    Returns:
+    policy (Policy): resulting policy computed for a mdp, that maps a state to an action (see mdp.policy.Policy)
+    value_function (list): value function found by this algorithm, represented as list with values w.r.t mdp.states
+    statistics (dict): dictionary containing some statistics about the algorithm execution. We have three statistics
+                      here: "iterations" that is the number of iterations executed, "bellman_backups_done" that is the
+                      overall number of Bellman backups executed and "maximum_residuals" that is the maximum residual
+                      found in each iteration.
+    """
+    if initial_value_function is None:
+        value_function = np.zeros(( len(mdp.states), 1 ))
+    else:
+        value_function = np.array(initial_value_function, dtype=float).reshape(( len(mdp.states), 1 ))
+
+    bellman_backups_done = 0
+    iterations = 0
+    maximum_residuals = []
+
+    while max_iterations is None or iterations < max_iterations:
+        qualities = compute_qualities(mdp, gamma, value_function)
+        next_value_function = qualities.max(axis=0).reshape(( len(mdp.states), 1 ))
+
+        iterations = iterations + 1
+        bellman_backups_done = bellman_backups_done + len(mdp.states)
+        maximum_residuals.append(compute_maximum_residual(next_value_function, value_function))
+
+        value_function = next_value_function
+
+        if maximum_residuals[-1] < epsilon:
+            break
+
+    # compute policy
+    policy = compute_greedy_policy(mdp, compute_qualities(mdp, gamma, value_function), value_function)
+
+    statistics = {
+        "iterations": iterations,
+        "bellman_backups_done": bellman_backups_done,
+        "maximum_residuals": maximum_residuals
+    }
+
+    return policy, value_function, statistics
+
+def compute_scenario_qualities(mdp, rewards, gammas, value_functions):
+    """Computes the quality of every (scenario, action, state) triple at once, returning an array with shape
+    (scenarios, actions, states). Each transition matrix is applied to the value functions of all scenarios together."""
+    qualities = np.zeros(rewards.shape)
+
+    for action_index, action in enumerate(mdp.actions):
+        transition_matrix = mdp.transition_matrix(action)
+        pondered_sums = np.asarray(transition_matrix.dot(value_functions.T)).T
+
+        qualities[:, action_index, :] = rewards[:, action_index, :] + gammas[:, np.newaxis] * pondered_sums
+
+    return qualities
+
+def enumerative_multi_scenario_finite_horizon_value_iteration(mdp, rewards, gammas, horizon):
+    """Executes the Value Iteration algorithm for finite horizon MDPs on several scenarios that share the mdp
+    transitions but differ on rewards and discount factors. The Bellman backups of all scenarios are done together.
+    Parameters:
+    mdp (EnumerativeMDP): enumerative Markov Decison Problem whose transitions are shared by all scenarios (its
+                          rewards are ignored)
+    rewards (array): array with shape (scenarios, actions, states) with the reward of each scenario w.r.t mdp.actions
+                     and mdp.states (see sir_modelling.enumerative_model.get_scenario_rewards)
+    gammas (list of float): discount factor applied to each scenario
+    horizon (int): number of steps that can be done in this MDP
+    Returns:
+    policies (list of Policy): resulting policy computed for each scenario, that maps a state to an action
+    value_functions (array): array with shape (scenarios, states) with the value function found for each scenario
+    statistics (dict): dictionary containing some statistics about the algorithm execution. We have two statistics here:
+                      "iterations" that is equal to the horizon parameter and "bellman_backups_done" that is the overall
+                      number of Bellman backups executed (summing all scenarios).
+    """
+    rewards = np.asarray(rewards, dtype=float)
+    gammas = np.asarray(gammas, dtype=float)
+
+    number_of_scenarios = rewards.shape[0]
+
+    if rewards.shape != (number_of_scenarios, len(mdp.actions), len(mdp.states)):
+        raise ValueError(f"rewards should have shape (scenarios, {len(mdp.actions)}, {len(mdp.states)}), got {rewards.shape}")
+    if gammas.shape != (number_of_scenarios,):
+        raise ValueError(f"expected {number_of_scenarios} gammas, got {gammas.shape[0]}")
+
+    value_functions = np.zeros(( number_of_scenarios, len(mdp.states) ))
+
+    bellman_backups_done = 0
+
+    for n in range(horizon - 1, -1, -1): # range from H - 1 to 0
+        value_functions = compute_scenario_qualities(mdp, rewards, gammas, value_functions).max(axis=1)
+        bellman_backups_done = bellman_backups_done + number_of_scenarios * len(mdp.states)
+
+    # compute policies
+    qualities = compute_scenario_qualities(mdp, rewards, gammas, value_functions)
+    policies = list(map(lambda scenario: compute_greedy_policy(mdp, qualities[scenario], value_functions[scenario]), range(number_of_scenarios)))
+
+    statistics = {
+        "iterations": horizon,
+        "bellman_backups_done": bellman_backups_done
+    }
+
+    return policies, value_functions, statistics
+
+def compute_chunked_qualities(mdp, gamma, value_function, start, stop):
+    successors = np.asarray(mdp.successors[:, start:stop])
+    rewards = np.asarray(mdp.rewards[:, start:stop])
+
+    return rewards + gamma * value_function[successors]
+
+def streaming_finite_horizon_value_iteration(mdp, gamma, horizon, chunk_size = 1000000, epsilon = None):
+    """Executes the Value Iteration algorithm for finite horizon MDPs over a memory mapped representation (see
+    sir_modelling.streaming_model), reading the successors and rewards of chunk_size states at a time. Only the value
+    functions are kept in memory.
+    Parameters:
+    mdp (StreamedMDP): deterministic mdp with successors and rewards arrays with shape (actions, states)
+    gamma (float): discount factor applied to solve this MDP
+    horizon (int): number of steps that can be done in this MDP
+    chunk_size (int): number of states backed up at once
+    epsilon (float): optional maximum residual allowed between V_k and V_{k+1}, used to stop before the horizon
+    Returns:
+    policy (Policy): resulting policy computed for a mdp, accessed by state id (see mdp.policy.Policy)
+    value_function (array): value function found by this algorithm, w.r.t state ids
+    statistics (dict): same statistics of enumerative_finite_horizon_value_iteration.
+    """
+    number_of_states = mdp.successors.shape[1]
+
+    last_horizon_value_function = np.zeros(number_of_states)
+
+    bellman_backups_done = 0
+    iterations = 0
+
+    for n in range(horizon - 1, -1, -1): # range from H - 1 to 0
+        current_horizon_value_function = np.zeros(number_of_states)
+
+        for start in range(0, number_of_states, chunk_size):
+            stop = min(start + chunk_size, number_of_states)
+            qualities = compute_chunked_qualities(mdp, gamma, last_horizon_value_function, start, stop)
+            current_horizon_value_function[start:stop] = qualities.max(axis=0)
+
+        bellman_backups_done = bellman_backups_done + number_of_states
+        iterations = iterations + 1
+        maximum_residual = compute_maximum_residual(current_horizon_value_function, last_horizon_value_function)
+
+        last_horizon_value_function = current_horizon_value_function
+
+        if epsilon is not None and maximum_residual < epsilon:
+            break
+
+    # compute policy
+    action_indexes = np.zeros(number_of_states, dtype=int)
+    for start in range(0, number_of_states, chunk_size):
+        stop = min(start + chunk_size, number_of_states)
+        action_indexes[start:stop] = np.argmax(compute_chunked_qualities(mdp, gamma, last_horizon_value_function, start, stop), axis=0)
+
+    policy = Policy(None, mdp.actions, action_indexes, last_horizon_value_function)
+
+    statistics = {
+        "iterations": iterations,
+        "bellman_backups_done": bellman_backups_done
+    }
+
+    return policy, last_horizon_value_function, statistics
@@ -0,0 +1,253 @@
+from collections.abc import Mapping
+
+import os
+
+import numpy as np
+
+# number of states shown by the repr of a Policy
+REPR_STATES = 5
+
+def get_action_index_dtype(number_of_actions):
+    return np.min_scalar_type(max(number_of_actions - 1, 0))
+
+class Policy(Mapping):
+    """Stationary policy stored as an array of action indexes aligned with state ids (uint8 for up to 256 actions)
+    and, optionally, the value of each state.
+    It also behaves as a read-only dict that maps a state name to an action, so it can be used wherever the old dict
+    policies were used (policies without state names are only accessed by state id, and can not be iterated). State
+    names are kept as a byte string array and found by binary search, so no per-state Python object is created.
+    """
+
+    def __init__(self, states, actions, action_indexes, value_function = None, value_dtype = np.float64):
+        """
+        Parameters:
+        states (list of string): state names w.r.t state ids, or None for policies that are only accessed by state id
+        actions (list): actions of the mdp (e.g. the betas)
+        action_indexes (array): index in actions of the action chosen for each state id
+        value_function (array): optional value of each state id
+        value_dtype (numpy dtype): dtype used to store the value function (e.g. np.float32 to halve its size)
+        """
+        self.actions = list(actions)
+        self.action_indexes = np.asarray(action_indexes).ravel().astype(get_action_index_dtype(len(self.actions)), copy=False)
+
+        self.value_function = None
+        if value_function is not None:
+            self.value_function = np.asarray(value_function).ravel().astype(value_dtype, copy=False)
+
+        self.states = None
+        self.state_order = None
+        self.sorted_states = None
+
+        if states is not None:
+            self.set_states(np.asarray(states, dtype=np.bytes_))
+
+    def set_states(self, states):
+        if len(states) != len(self.action_indexes):
+            raise ValueError(f"expected {len(self.action_indexes)} states, got {len(states)}")
+
+        self.states = states
+
+        if np.all(states[:-1] < states[1:]):
+            self.sorted_states = states
+        else:
+            self.state_order = np.argsort(states, kind="stable").astype(np.min_scalar_type(len(states)))
+            self.sorted_states = states[self.state_order]
+
+    def with_arrays(self, action_indexes, value_function = None):
+        """Returns a policy with other action indexes and values that shares the state names (and their index) of
+        this one, without copying them."""
+        policy = Policy(None, self.actions, action_indexes, value_function,
+                        value_function.dtype if value_function is not None else np.float64)
+
+        policy.states = self.states
+        policy.state_order = self.state_order
+        policy.sorted_states = self.sorted_states
+
+        return policy
+
+    @staticmethod
+    def from_dict(policy, actions = None, value_function = None, value_dtype = np.float64):
+        """Creates a policy from a dict that maps a state name to an action. value_function, when informed, is a dict
+        that maps a state name to its value."""
+        states = sorted(policy.keys())
+
+        if actions is None:
+            actions = sorted(set(policy.values()))
+
+        action_ids = {}
+        for action_index, action in enumerate(actions):
+            action_ids[action] = action_index
+
+        action_indexes = list(map(lambda state: action_ids[policy[state]], states))
+
+        values = None
+        if value_function is not None:
+            values = list(map(lambda state: float(np.ravel(value_function.get(state, 0.0))[0]), states))
+
+        return Policy(states, actions, action_indexes, values, value_dtype)
+
+    def state_id(self, state):
+        """Returns the id of a state name, or -1 when the policy has no such state."""
+        if self.states is None:
+            raise KeyError("this policy has no state names, access it by state id")
+
+        key = np.bytes_(state)
+        position = np.searchsorted(self.sorted_states, key)
+
+        if position == len(self.sorted_states) or self.sorted_states[position] != key:
+            return -1
+
+        if self.state_order is None:
+            return int(position)
+
+        return int(self.state_order[position])
+
+    def action_at(self, state_id):
+        return self.actions[self.action_indexes[state_id]]
+
+    def actions_at(self, state_ids):
+        """Returns the actions chosen for an array of state ids."""
+        return np.asarray(self.actions)[self.action_indexes[state_ids]]
+
+    def value_at(self, state_id):
+        return self.value_function[state_id]
+
+    def value(self, state):
+        return self.value_function[self.get_state_id_or_fail(state)]
+
+    def get_state_id_or_fail(self, state):
+        state_id = self.state_id(state)
+
+        if state_id < 0:
+            raise KeyError(state)
+
+        return state_id
+
+    def __getitem__(self, state):
+        return self.action_at(self.get_state_id_or_fail(state))
+
+    def __contains__(self, state):
+        return self.states is not None and self.state_id(state) >= 0
+
+    def __iter__(self):
+        # the mapping is over state names, so a policy without them can not be iterated
+        if self.states is None:
+            raise TypeError("this policy has no state names, access it by state id")
+
+        return map(lambda state: state.decode(), self.states)
+
+    def __len__(self):
+        return len(self.action_indexes)
+
+    def __repr__(self):
+        if self.states is None:
+            return f"Policy(states={len(self)}, actions={self.actions})"
+
+        items = list(map(lambda state_id: f"{self.states[state_id].decode()!r}: {self.action_at(state_id)!r}",
+                         range(min(len(self), REPR_STATES))))
+        if len(self) > REPR_STATES:
+            items.append("...")
+
+        return f"Policy({{{', '.join(items)}}}, states={len(self)}, actions={self.actions})"
+
+    def save(self, directory):
+        """Saves the policy as .npy files inside a directory."""
+        os.makedirs(directory, exist_ok=True)
+
+        np.save(os.path.join(directory, "action_indexes.npy"), self.action_indexes)
+        np.save(os.path.join(directory, "actions.npy"), np.asarray(self.actions))
+
+        if self.states is not None:
+            np.save(os.path.join(directory, "states.npy"), self.states)
+
+        if self.value_function is not None:
+            np.save(os.path.join(directory, "value_function.npy"), self.value_function)
+
+    @staticmethod
+    def load(directory, mmap_mode = None):
+        """Loads a policy saved with save. With mmap_mode="r" the arrays are memory mapped instead of read."""
+        def load_array(name):
+            path = os.path.join(directory, name)
+            if not os.path.exists(path):
+                return None
+            return np.load(path, mmap_mode=mmap_mode)
+
+        actions = np.load(os.path.join(directory, "actions.npy")).tolist()
+        value_function = load_array("value_function.npy")
+
+        policy = Policy(None, actions, load_array("action_indexes.npy"), value_function,
+                        value_function.dtype if value_function is not None else np.float64)
+
+        states = load_array("states.npy")
+        if states is not None:
+            policy.set_states(states)
+
+        return policy
+
+class NonStationaryPolicy:
+    """Finite horizon policy, where the action depends on the step: an action index table with shape
+    (horizon, states) (uint8 for up to 256 actions) and, optionally, a value table with the same shape, where row t
+    has the values with horizon - t steps to go. Tables may be memory mapped .npy files."""
+
+    def __init__(self, states, actions, action_table, value_table = None):
+        self.actions = list(actions)
+        self.action_table = action_table
+        self.value_table = value_table
+
+        # policy of the first step, whose state name index is shared by every step
+        self.first_step_policy = Policy(states, actions, action_table[0], None if value_table is None else value_table[0],
+                                        np.float64 if value_table is None else value_table.dtype)
+
+    @property
+    def horizon(self):
+        return self.action_table.shape[0]
+
+    def at_step(self, step):
+        """Returns the stationary Policy followed at a step (a view of the tables, without copies)."""
+        return self.first_step_policy.with_arrays(self.action_table[step], None if self.value_table is None else self.value_table[step])
+
+    def action_at(self, step, state_id):
+        return self.actions[self.action_table[step, state_id]]
+
+    def action(self, step, state):
+        return self.action_at(step, self.first_step_policy.get_state_id_or_fail(state))
+
+    def value(self, step, state):
+        return self.value_table[step, self.first_step_policy.get_state_id_or_fail(state)]
+
+    def __len__(self):
+        return self.horizon
+
+    def __repr__(self):
+        return f"NonStationaryPolicy(horizon={self.horizon}, states={len(self.first_step_policy)}, actions={self.actions})"
+
+    def save(self, directory):
+        """Saves the policy as .npy files inside a directory (tables already written there are kept as is)."""
+        os.makedirs(directory, exist_ok=True)
+
+        save_table(os.path.join(directory, "action_table.npy"), self.action_table)
+        np.save(os.path.join(directory, "actions.npy"), np.asarray(self.actions))
+
+        if self.first_step_policy.states is not None:
+            np.save(os.path.join(directory, "states.npy"), self.first_step_policy.states)
+
+        if self.value_table is not None:
+            save_table(os.path.join(directory, "value_table.npy"), self.value_table)
+
+    @staticmethod
+    def load(directory, mmap_mode = None):
+        """Loads a policy saved with save. With mmap_mode="r" the tables are memory mapped instead of read."""
+        def load_array(name):
+            path = os.path.join(directory, name)
+            if not os.path.exists(path):
+                return None
+            return np.load(path, mmap_mode=mmap_mode)
+
+        return NonStationaryPolicy(load_array("states.npy"), np.load(os.path.join(directory, "actions.npy")).tolist(),
+                                   load_array("action_table.npy"), load_array("value_table.npy"))
+
+def save_table(path, table):
+    if isinstance(table, np.memmap) and os.path.abspath(table.filename) == os.path.abspath(path):
+        table.flush()
+    else:
+        np.save(path, table)
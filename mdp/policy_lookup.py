@@ -0,0 +1,134 @@
+import numpy as np
+
+from mdp.policy import NonStationaryPolicy
+from mdp.simplex_grid import SimplexGridIndex, barycentric_coordinates, normalize_points
+
+def approximate_points(points, precision):
+    """Vectorized version of sir_modelling.base_model.approximate_state for a batch of states with any number of
+    compartments: truncates each compartment to the grid, moves a negative first compartment to the second one and
+    assigns the truncation residual to the first compartment (or to the second one when the first is zero)."""
+    approximation_threshold = 1.0 / precision
+
+    # use integers to avoid floating point problems
+    approximated_points = np.trunc(np.asarray(points, dtype=float) / approximation_threshold).astype(np.int64)
+
+    # suscetible derivative can return a negative value sometimes
+    negative = approximated_points[:, 0] < 0
+    approximated_points[negative, 1] -= approximated_points[negative, 0]
+    approximated_points[negative, 0] = 0
+
+    residual = precision - approximated_points.sum(axis=1)
+    first_is_zero = approximated_points[:, 0] == 0
+
+    approximated_points[:, 0] += np.where(first_is_zero, 0, residual)
+    approximated_points[:, 1] += np.where(first_is_zero, residual, 0)
+
+    return approximated_points
+
+def truncate_points(points, precision):
+    """Vectorized version of mdp.algorithms.lrtdp_simulator.discretize_state, which only truncates each compartment."""
+    return np.trunc(np.asarray(points, dtype=float) * precision).astype(np.int64)
+
+class PolicyLookup:
+    """Answers batches of policy queries for continuous observations (e.g. surveillance numbers as fractions of the
+    population), mapping them onto the grid where the policy was computed."""
+
+    def __init__(self, policy, state_points, precision, snap = approximate_points, grid_index = None):
+        """
+        Parameters:
+        policy (Policy or NonStationaryPolicy): policy to be queried
+        state_points (array): int array with shape (states, compartments) with the grid coordinates of each state id
+                              of the policy (compartment fractions multiplied by precision)
+        precision (int): number of divisions of the grid (1.0 / approximation_threshold)
+        snap (function): function that receives an array of observations and the precision and returns their grid
+                         coordinates. Use approximate_points for enumerative models and truncate_points for policies
+                         found with enumerative_lrtdp_with_simulator
+        grid_index (SimplexGridIndex or LatticeIndex): optional index used instead of one built from state_points (which
+                                                      may then be None), e.g. a LatticeIndex when state ids are lattice
+                                                      ranks
+        """
+        self.policy = policy
+        self.precision = precision
+        self.snap = snap
+
+        if grid_index is None:
+            grid_index = SimplexGridIndex(state_points, precision)
+
+        self.grid_index = grid_index
+
+        self.actions = np.asarray(policy.actions, dtype=float)
+
+    def query(self, observations, method = "nearest", step = None):
+        """Finds the action and value for each observation.
+        Parameters:
+        observations (array): array with shape (M, compartments), e.g. rows of (S, I, R) or (S, E, I, R). Each row is
+                              normalized to sum to one, so it may also be given as head counts
+        method (string): "nearest" to snap each observation to its grid state or "barycentric" to interpolate the
+                         values of the vertices of the grid simplex containing it (the action is the one of the
+                         vertex with the largest weight). Observations whose simplex has no vertex on the grid (e.g.
+                         on sparse grids, such as the ones of truncate_points policies) fall back to "nearest"
+        step (int): step of the query, required for a NonStationaryPolicy
+        Returns:
+        actions (array): array with shape (M,) with the action for each observation (NaN when it is out of the grid)
+        values (array): array with shape (M,) with the value for each observation (NaN when it is out of the grid or
+                        the policy has no value function)
+        """
+        # both methods see the same observations, scaled to fractions summing to one
+        observations = normalize_points(np.atleast_2d(np.asarray(observations, dtype=float)))
+
+        policy = self.policy
+        if isinstance(policy, NonStationaryPolicy):
+            if step is None:
+                raise ValueError("queries to a non stationary policy require a step")
+            policy = policy.at_step(step)
+
+        if method == "nearest":
+            return self.query_nearest(policy, observations)
+        if method == "barycentric":
+            return self.query_barycentric(policy, observations)
+
+        raise ValueError(f"unknown lookup method: {method}")
+
+    def query_nearest(self, policy, observations):
+        state_ids = self.grid_index.lookup(self.snap(observations, self.precision))
+        return self.get_actions(policy, state_ids), self.get_values(policy, state_ids)
+
+    def query_barycentric(self, policy, observations):
+        vertices, weights = barycentric_coordinates(observations, self.precision)
+
+        vertex_ids = self.grid_index.lookup(vertices)
+        weights = np.where(vertex_ids >= 0, weights, 0.0)
+
+        totals = weights.sum(axis=1)
+        on_grid = totals > 0
+
+        rows = np.arange(len(observations))
+        heaviest_vertices = np.argmax(weights, axis=1)
+        state_ids = np.where(on_grid, vertex_ids[rows, heaviest_vertices], -1)
+
+        actions = self.get_actions(policy, state_ids)
+
+        if policy.value_function is None:
+            values = np.full(len(observations), np.nan)
+        else:
+            with np.errstate(invalid="ignore", divide="ignore"):
+                values = (weights * policy.value_function[np.maximum(vertex_ids, 0)]).sum(axis=1) / totals
+
+        # observations without any vertex on the grid are snapped to their nearest state
+        if not np.all(on_grid):
+            nearest_actions, nearest_values = self.query_nearest(policy, observations[~on_grid])
+            actions[~on_grid] = nearest_actions
+            values[~on_grid] = nearest_values
+
+        return actions, values
+
+    def get_actions(self, policy, state_ids):
+        actions = self.actions[policy.action_indexes[np.maximum(state_ids, 0)]]
+        return np.where(state_ids >= 0, actions, np.nan)
+
+    def get_values(self, policy, state_ids):
+        if policy.value_function is None:
+            return np.full(len(state_ids), np.nan)
+
+        values = policy.value_function[np.maximum(state_ids, 0)]
+        return np.where(state_ids >= 0, values, np.nan)
@@ -0,0 +1,208 @@
+import math
+
+import numpy as np
+
+def encode_points(points, precision):
+    """Encodes integer lattice points as int64 keys (mixed radix with base precision + 1)."""
+    points = np.asarray(points, dtype=np.int64)
+    radix = np.int64(precision + 1)
+
+    keys = np.zeros(points.shape[:-1], dtype=np.int64)
+    for dimension in range(points.shape[-1]):
+        keys = keys * radix + points[..., dimension]
+
+    return keys
+
+class SimplexGridIndex:
+    """Maps integer lattice points (compartment fractions multiplied by precision) to state ids, using a sorted key
+    array so that a batch of points is resolved with a single vectorized binary search."""
+
+    def __init__(self, points, precision):
+        points = np.asarray(points, dtype=np.int64)
+
+        self.precision = precision
+        self.dimension = points.shape[1]
+
+        keys = encode_points(points, precision)
+
+        self.order = np.argsort(keys, kind="stable").astype(np.int64)
+        self.sorted_keys = keys[self.order]
+
+    def lookup(self, points):
+        """Returns the state id of each point, or -1 for points that are not on the grid."""
+        points = np.asarray(points, dtype=np.int64)
+        out_of_grid = np.any((points < 0) | (points > self.precision), axis=-1)
+
+        keys = encode_points(np.clip(points, 0, self.precision), self.precision)
+
+        positions = np.searchsorted(self.sorted_keys, keys)
+        positions = np.minimum(positions, len(self.sorted_keys) - 1)
+
+        found = (self.sorted_keys[positions] == keys) & ~out_of_grid
+
+        return np.where(found, self.order[positions], -1)
+
+class LatticeIndex:
+    """Index with the same interface of SimplexGridIndex for grids whose state ids are the lattice ranks of their
+    points (see lattice_ranks), e.g. sir_modelling.streaming_model. Points are resolved arithmetically, so nothing is
+    stored per state."""
+
+    def __init__(self, precision, dimension):
+        self.precision = precision
+        self.dimension = dimension
+
+    def lookup(self, points):
+        """Returns the state id of each point, or -1 for points that are not on the lattice."""
+        points = np.asarray(points, dtype=np.int64)
+        on_lattice = np.all(points >= 0, axis=-1) & (points.sum(axis=-1) == self.precision)
+
+        return np.where(on_lattice, lattice_ranks(np.maximum(points, 0), self.precision), -1)
+
+def normalize_points(points):
+    """Scales each row of compartment values (e.g. fractions with rounding errors or head counts) so it sums to one.
+    Rows without a positive sum are mapped to the center of the simplex."""
+    points = np.asarray(points, dtype=float)
+    totals = points.sum(axis=1, keepdims=True)
+
+    return np.divide(points, totals, out=np.full_like(points, 1.0 / points.shape[1]), where=totals > 0)
+
+def barycentric_coordinates(points, precision):
+    """Finds the lattice simplex that contains each point and its barycentric weights.
+    Points are compartment fractions summing to one, the lattice is the set of integer points summing to precision and
+    the triangulation is the Freudenthal one, built on the cumulative sums of the compartments, which exactly tiles the
+    probability simplex.
+    Parameters:
+    points (array): array with shape (M, d) of compartment fractions
+    precision (int): number of divisions of the grid (1.0 / approximation_threshold)
+    Returns:
+    vertices (array): int array with shape (M, d, d) with the d lattice points of the simplex containing each point
+    weights (array): float array with shape (M, d) with the barycentric weights of each vertex
+    """
+    points = normalize_points(np.clip(np.asarray(points, dtype=float), 0.0, None))
+    number_of_points, dimension = points.shape
+
+    cumulative = np.clip(np.cumsum(points[:, :-1], axis=1) * precision, 0.0, precision)
+
+    base = np.floor(cumulative)
+    fractions = cumulative - base
+
+    # visit coordinates by descending fractional part
+    order = np.argsort(-fractions, axis=1, kind="stable")
+    sorted_fractions = np.take_along_axis(fractions, order, axis=1)
+
+    weights = np.empty((number_of_points, dimension))
+    weights[:, 0] = 1.0 - sorted_fractions[:, 0]
+    weights[:, 1:-1] = sorted_fractions[:, :-1] - sorted_fractions[:, 1:]
+    weights[:, -1] = sorted_fractions[:, -1]
+
+    cumulative_vertices = np.repeat(base[:, np.newaxis, :], dimension, axis=1).astype(np.int64)
+    rows = np.arange(number_of_points)
+    for step in range(1, dimension):
+        cumulative_vertices[:, step:, :][rows, :, order[:, step - 1]] += 1
+
+    # go back from cumulative sums to compartments
+    vertices = np.empty((number_of_points, dimension, dimension), dtype=np.int64)
+    vertices[:, :, 0] = cumulative_vertices[:, :, 0]
+    vertices[:, :, 1:-1] = np.diff(cumulative_vertices, axis=2)
+    vertices[:, :, -1] = precision - cumulative_vertices[:, :, -1]
+
+    # vertices out of the lattice (only possible on its boundary) have zero weight, replace them by the first vertex
+    out_of_lattice = np.any((vertices < 0) | (vertices > precision), axis=2)
+    vertices = np.where(out_of_lattice[:, :, np.newaxis], vertices[:, :1, :], vertices)
+
+    return vertices, weights
+
+def interpolate(values, grid_index, points):
+    """Interpolates values defined on the grid states at continuous points using barycentric interpolation. Vertices
+    missing from the grid are ignored and the remaining weights are normalized.
+    Parameters:
+    values (array): values w.r.t the state ids of grid_index
+    grid_index (SimplexGridIndex): index of the grid where values are defined
+    points (array): array with shape (M, d) of compartment fractions
+    Returns:
+    interpolated_values (array): array with shape (M,) with the interpolated values (NaN when no vertex is on grid)
+    """
+    values = np.asarray(values, dtype=float).ravel()
+    vertices, weights = barycentric_coordinates(points, grid_index.precision)
+
+    state_ids = grid_index.lookup(vertices)
+    weights = np.where(state_ids >= 0, weights, 0.0)
+
+    totals = weights.sum(axis=1)
+    vertex_values = values[np.maximum(state_ids, 0)]
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return (weights * vertex_values).sum(axis=1) / totals
+
+def binomial(n, k):
+    """Vectorized binomial coefficient C(n, k) for int64 arrays and a small k (zero when n < k)."""
+    n = np.asarray(n, dtype=np.int64)
+    result = np.ones(n.shape, dtype=np.int64)
+
+    for i in range(k):
+        result = result * (n - i) // (i + 1)
+
+    return np.where(n >= k, result, 0)
+
+def lattice_size(precision, dimension):
+    """Number of lattice points with dimension compartments summing to precision."""
+    return int(binomial(precision + dimension - 1, dimension - 1))
+
+def lattice_ranks(points, precision):
+    """Returns the position of each lattice point in the lexicographic order of the lattice (the order used by
+    sir_modelling.base_model.enumerate_states), so chunks of the lattice can be indexed without enumerating it."""
+    points = np.asarray(points, dtype=np.int64)
+    dimension = points.shape[-1]
+
+    ranks = np.zeros(points.shape[:-1], dtype=np.int64)
+    remaining = np.full(points.shape[:-1], precision, dtype=np.int64)
+
+    for k in range(dimension - 1):
+        following = dimension - k - 1
+        ranks += binomial(remaining + following, following) - binomial(remaining - points[..., k] + following, following)
+        remaining = remaining - points[..., k]
+
+    return ranks
+
+def lattice_rank(point, precision):
+    """Scalar version of lattice_ranks, for a single point given as a sequence of ints."""
+    rank = 0
+    remaining = precision
+
+    for k in range(len(point) - 1):
+        following = len(point) - k - 1
+        rank += math.comb(remaining + following, following) - math.comb(remaining - point[k] + following, following)
+        remaining -= point[k]
+
+    return rank
+
+def lattice_points(start, stop, precision, dimension):
+    """Returns the lattice points with ranks in [start, stop), in lexicographic order."""
+    return lattice_points_at(np.arange(start, stop, dtype=np.int64), precision, dimension)
+
+def lattice_points_at(ranks, precision, dimension):
+    """Returns the lattice points with the given ranks (inverse of lattice_ranks)."""
+    ranks = np.asarray(ranks, dtype=np.int64)
+    points = np.zeros(( len(ranks), dimension ), dtype=np.int64)
+    remaining = np.full(len(ranks), precision, dtype=np.int64)
+
+    for k in range(dimension - 1):
+        following = dimension - k - 1
+        total = binomial(remaining + following, following)
+
+        # largest value whose preceding points (total - C(remaining - value + following, following)) fit in the rank
+        low = np.zeros(len(ranks), dtype=np.int64)
+        high = remaining.copy()
+        while np.any(low < high):
+            middle = (low + high + 1) // 2
+            fits = total - binomial(remaining - middle + following, following) <= ranks
+            low = np.where(fits, middle, low)
+            high = np.where(fits, high, middle - 1)
+
+        points[:, k] = low
+        ranks = ranks - (total - binomial(remaining - low + following, following))
+        remaining = remaining - low
+
+    points[:, -1] = remaining
+
+    return points
@@ -0,0 +1,38 @@
+# Author: Luis Gustavo Nonato  -- <gnonato@icmc.usp.br>
+# License: See LICENSE.md file in the repository.
+# Calibration of the initial condition of the SEIR epidemic model
+
+import numpy as np
+from scipy.integrate import solve_ivp
+from scipy.optimize import minimize
+
+
+class initial_condition():
+    def __init__(self,data):
+        self.ndays = data.shape[0]
+        self.data = data
+        self.Rt = 2.5
+        self.Tinc = 5.2
+        self.Tinf = 2.9
+
+    def run(self,init0):
+
+        def _seir(t,y):
+            S = y[0]
+            E = y[1]
+            I = y[2]
+            R = y[3]
+            return(np.asarray([-(self.Rt/self.Tinf)*S*I, (self.Rt/self.Tinf)*S*I - (1.0/self.Tinc)*E, (1.0/self.Tinc)*E - (1.0/self.Tinf)*I, (1.0/self.Tinf)*I]))
+
+        def loss(EI):
+            f = solve_ivp(_seir, [0, self.ndays], (init0[0],EI[0],EI[1],init0[3]), t_eval=np.arange(0, self.ndays, 1))
+            return(np.sqrt(np.mean((f.y[2] - self.data)**2)))
+
+        optimal = minimize(
+            loss,
+            [init0[1],init0[2]],
+            method='L-BFGS-B',
+            bounds=[(0.0, 1.0), (0.0, 1.0)])
+
+        E0, I0 = optimal.x
+        return(E0,I0)
@@ -1,13 +1,37 @@
 from seir_modelling.seir import seir
 
 class Simulator:
-    def __init__(self, initial_state, r0_values, days_per_action):
+    def __init__(self, initial_state, r0_values, days_per_action, surrogate_precision = None, surrogate_tolerance = None,
+                 surrogate_validation_samples = 100):
+        '''
+        surrogate_precision: when informed, actions are simulated with a FlowMapSurrogate tabulated over a lattice with
+                             this number of divisions per compartment, instead of integrating the SEIR model
+        surrogate_tolerance: when informed, the surrogate is compared with the exact solver on surrogate_validation_samples
+                             random states and on the exact trajectories from initial_state, and a ValueError is raised
+                             if its maximum absolute error exceeds it
+        '''
         self.initial_state = initial_state
         self.actions = r0_values
         self.days_per_action = days_per_action
 
         self.inner_simulator = seir(days_per_action)
 
+        self.surrogate = None
+        self.surrogate_error = None
+
+        if surrogate_precision is not None:
+            from seir_modelling.surrogate import FlowMapSurrogate
+
+            self.surrogate = FlowMapSurrogate(r0_values, days_per_action, surrogate_precision,
+                                              self.inner_simulator.Tinc, self.inner_simulator.Tinf)
+
+            if surrogate_tolerance is not None:
+                self.surrogate_error = self.surrogate.validate(surrogate_validation_samples, initial_states=[ initial_state ])
+
+                if self.surrogate_error > surrogate_tolerance:
+                    raise ValueError(f"surrogate error {self.surrogate_error} exceeds tolerance {surrogate_tolerance}, "
+                                     f"increase surrogate_precision")
+
         self.start()
 
     def start(self):
@@ -15,6 +39,9 @@ class Simulator:
         return self.current_state
 
     def simulate_action(self, action):
+        if self.surrogate is not None:
+            return self.surrogate.simulate_state(self.current_state, action)
+
         self.inner_simulator.R0 = action
 
         S, E, I, R = self.inner_simulator.run(self.current_state)
@@ -0,0 +1,126 @@
+import math
+
+import numpy as np
+
+from mdp.simplex_grid import barycentric_coordinates, lattice_points, lattice_rank, lattice_ranks, lattice_size
+
+class FlowMapSurrogate:
+    """Surrogate of the SEIR simulator: the state reached after days_per_action days with each R0 is tabulated once
+    over a simplex lattice of (S, E, I, R) states, using a single batched integration per R0, and queries are answered
+    by barycentric interpolation of the tabulated flow map."""
+
+    def __init__(self, r0_values, days_per_action, precision = 20, Tinc = 5.2, Tinf = 2.9, chunk_size = 50000):
+        """
+        Parameters:
+        r0_values (list of float): R0 values (actions) whose flow maps are tabulated
+        days_per_action (int): number of days of each action (as in Simulator)
+        precision (int): number of divisions of each compartment in the lattice
+        Tinc (float): incubation time of the SEIR model
+        Tinf (float): infection time of the SEIR model
+        chunk_size (int): number of lattice states integrated at once
+        """
+        self.days_per_action = days_per_action
+        self.precision = precision
+        self.Tinc = Tinc
+        self.Tinf = Tinf
+
+        number_of_states = lattice_size(precision, 4)
+
+        self.flow_maps = {}
+        for r0 in r0_values:
+            flow_map = np.zeros(( number_of_states, 4 ))
+
+            for start in range(0, number_of_states, chunk_size):
+                stop = min(start + chunk_size, number_of_states)
+                flow_map[start:stop] = self.integrate(lattice_points(start, stop, precision, 4) / precision, r0)
+
+            self.flow_maps[r0] = flow_map
+
+    def integrate(self, states, r0):
+        """Integrates a batch of states as a single ODE system, up to the last day returned by seir.run."""
+        from scipy.integrate import solve_ivp
+
+        number_of_states = len(states)
+
+        def _seir(t, y):
+            S, E, I, R = y.reshape(( 4, number_of_states ))
+            return np.concatenate([-(r0/self.Tinf)*S*I, (r0/self.Tinf)*S*I - (1.0/self.Tinc)*E, (1.0/self.Tinc)*E - (1.0/self.Tinf)*I, (1.0/self.Tinf)*I])
+
+        final_day = self.days_per_action - 1
+        solution = solve_ivp(_seir, [0, final_day], np.asarray(states, dtype=float).T.ravel(), t_eval=[final_day], rtol=1e-8, atol=1e-10)
+
+        return solution.y[:, -1].reshape(( 4, number_of_states )).T
+
+    def simulate(self, states, action):
+        """Returns an array with shape (M, 4) with the states reached from a batch of (S, E, I, R) states, given as
+        fractions of the population (summing to one, as the states produced by the simulator)."""
+        states = np.atleast_2d(np.asarray(states, dtype=float))
+
+        vertices, weights = barycentric_coordinates(states, self.precision)
+        next_states = self.flow_maps[action][lattice_ranks(vertices, self.precision)]
+
+        return (weights[:, :, np.newaxis] * next_states).sum(axis=1)
+
+    def simulate_state(self, state, action):
+        """Same as simulate for a single state, computed with plain Python arithmetic since numpy calls would dominate
+        the time of a single query."""
+        total = sum(state)
+        cumulative = []
+        running_sum = 0.0
+        for compartment in state[:-1]:
+            running_sum += max(compartment, 0.0) / total
+            cumulative.append(min(running_sum * self.precision, self.precision))
+
+        base = [ math.floor(value) for value in cumulative ]
+        fractions = [ value - floor for value, floor in zip(cumulative, base) ]
+        order = sorted(range(len(fractions)), key=lambda index: -fractions[index])
+
+        flow_map = self.flow_maps[action]
+        vertex = list(base)
+        last_fraction = 1.0
+        next_state = np.zeros(len(state))
+
+        # walk the Freudenthal simplex from its first vertex, adding one unit of cumulative sum at a time
+        for step in range(len(state)):
+            fraction = fractions[order[step]] if step < len(order) else 0.0
+            weight = last_fraction - fraction
+
+            if weight > 0.0:
+                point = [ vertex[0] ] + [ vertex[k] - vertex[k - 1] for k in range(1, len(vertex)) ] + [ self.precision - vertex[-1] ]
+                next_state += weight * flow_map[lattice_rank(point, self.precision)]
+
+            if step < len(order):
+                vertex[order[step]] += 1
+            last_fraction = fraction
+
+        return tuple(next_state)
+
+    def validate(self, sample_size = 100, seed = 0, initial_states = None, trajectory_steps = 10):
+        """Compares the surrogate with the exact flow map, returning the maximum absolute error over every compartment,
+        state and action. Exact states are found with integrate (rtol 1e-8), since the default tolerances of seir.run
+        (rtol 1e-3) give errors around 2e-4, which would hide the surrogate errors of fine lattices. States are drawn from a uniform Dirichlet
+        distribution with a fixed seed, which rarely falls in the early epidemic corner where planning starts, so the
+        states of the exact trajectories of trajectory_steps actions from each of initial_states (one trajectory per
+        action) are checked as well."""
+        random_generator = np.random.default_rng(seed)
+        states = list(random_generator.dirichlet(np.ones(4), size=sample_size))
+
+        for initial_state in (initial_states or []):
+            for action in self.flow_maps.keys():
+                state = np.asarray(initial_state, dtype=float)
+                states.append(state)
+
+                for _ in range(trajectory_steps):
+                    state = self.integrate(state[np.newaxis], action)[0]
+                    states.append(state)
+
+        states = np.array(states)
+
+        maximum_error = 0.0
+        for action in self.flow_maps.keys():
+            exact_states = self.integrate(states, action)
+            approximated_states = self.simulate(states, action)
+
+            maximum_error = max(maximum_error, np.max(np.abs(exact_states - approximated_states)))
+
+        return maximum_error
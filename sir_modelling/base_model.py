@@ -85,9 +85,12 @@ def enumerate_reward(approximation_threshold, beta, states, reward_function):
 
     return reward_per_state
 
+def default_reward_function(susceptibles, infective, recovered, beta):
+    return 10 * susceptibles + 5 * recovered - 15 * infective
+
 def create_representation(approximation_threshold, gamma, betas, steps_per_transition = 1, reward_function = None):
     if reward_function is None:
-        reward_function = lambda susceptibles, infective, recovered, beta: 10 * susceptibles + 5 * recovered - 15 * infective
+        reward_function = default_reward_function
 
     states = enumerate_states(approximation_threshold)
 
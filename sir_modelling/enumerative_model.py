@@ -1,5 +1,8 @@
 from collections import namedtuple
 from sir_modelling.base_model import create_representation as create_base_representation
+from mdp.simplex_grid import SimplexGridIndex, interpolate
+from mdp.policy import NonStationaryPolicy
+from mdp.policy_lookup import PolicyLookup
 
 import numpy as np
 
@@ -30,6 +33,53 @@ def get_state_numeric_values(human_readable_state, approximation_threshold):
     values = list(map(lambda value: int(value) * approximation_threshold, values_string.split("_")))
     return values[0], values[1], values[2]
 
+def get_state_lattice_points(human_readable_states):
+    """Returns an int array with shape (states, 3) with the grid coordinates (compartment / approximation_threshold)
+    of each state, together with the grid precision (1.0 / approximation_threshold)."""
+    points = np.array(list(map(lambda state: get_state_numeric_values(state, 1), human_readable_states)), dtype=np.int64)
+    precision = int(points[0].sum())
+
+    return points, precision
+
+def interpolate_value_function(coarse_mdp, coarse_value_function, mdp):
+    """Interpolates a value function found for a coarse grid onto the states of a finer grid, using barycentric
+    interpolation over the simplex grid of the coarse mdp."""
+    coarse_points, coarse_precision = get_state_lattice_points(coarse_mdp.states)
+    points, precision = get_state_lattice_points(mdp.states)
+
+    coarse_grid_index = SimplexGridIndex(coarse_points, coarse_precision)
+    value_function = interpolate(coarse_value_function, coarse_grid_index, points / precision)
+
+    # rewards are divided by the approximation threshold, so values must be rescaled between grids
+    value_function = value_function * (precision / coarse_precision)
+
+    return value_function.reshape(( len(mdp.states), 1 ))
+
+def create_policy_lookup(policy):
+    """Creates a PolicyLookup for a policy computed for an enumerative SIR model, so it can be queried with batches of
+    continuous (S, I, R) observations."""
+    points, precision = get_state_lattice_points(list(policy.at_step(0) if isinstance(policy, NonStationaryPolicy) else policy))
+    return PolicyLookup(policy, points, precision)
+
+def get_scenario_rewards(mdp, reward_functions):
+    """Computes the rewards of several scenarios over the states of an mdp, returning an array with shape
+    (scenarios, actions, states). Each reward function has the same signature as the reward_function of
+    create_representation and receives numpy arrays with the compartments of all states at once."""
+    points, precision = get_state_lattice_points(mdp.states)
+    approximation_threshold = 1.0 / precision
+
+    susceptibles = points[:, 0] * approximation_threshold
+    infective = points[:, 1] * approximation_threshold
+    recovered = points[:, 2] * approximation_threshold
+
+    rewards = np.zeros(( len(reward_functions), len(mdp.actions), len(mdp.states) ))
+
+    for scenario_index, reward_function in enumerate(reward_functions):
+        for action_index, beta in enumerate(mdp.actions):
+            rewards[scenario_index, action_index] = reward_function(susceptibles, infective, recovered, beta) / approximation_threshold
+
+    return rewards
+
 def get_human_readable_states(states, approximation_threshold):
     human_readable_states = []
 
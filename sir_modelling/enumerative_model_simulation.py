@@ -1,5 +1,7 @@
 import numpy as np
 
+from mdp.algorithms.value_iteration import get_successors
+from mdp.policy import NonStationaryPolicy
 from sir_modelling.enumerative_model import get_state_numeric_values
 
 def sample_state(mdp, state, action):
@@ -7,14 +9,9 @@ def sample_state(mdp, state, action):
     cummulative_probability = 0.0
 
     state_index = mdp.states.index(state)
-    transition_matrix = mdp.transition_matrix(action)
+    indexes, probabilities = get_successors(mdp, state_index, action)
 
-    indexes = np.nonzero(transition_matrix[state_index,:] > 0)
-
-    for next_state_index in indexes:
-        index = next_state_index[0]
-
-        probability = transition_matrix[state_index, index]
+    for index, probability in zip(indexes, probabilities):
         cummulative_probability = cummulative_probability + probability
         if sampled_probability < cummulative_probability:
             return mdp.states[index]
@@ -27,7 +24,10 @@ def simulate_policy_with_mdp_model(policy, initial_state, mdp, horizon, approxim
     chosen_betas = []
 
     for i in range(horizon):
-        beta = policy[state_name]
+        if isinstance(policy, NonStationaryPolicy):
+            beta = policy.action(i, state_name)
+        else:
+            beta = policy[state_name]
         state_name = sample_state(mdp, state_name, beta)
 
         chosen_betas.append(beta)
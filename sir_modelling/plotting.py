@@ -0,0 +1,23 @@
+import matplotlib.pyplot as plt
+
+def plot_sir(t, S, I, R, time_label='days'):
+  f, ax = plt.subplots(1,1,figsize=(10,4))
+  ax.plot(t, S, 'b', alpha=0.7, linewidth=2, label='Susceptible')
+  ax.plot(t, I, 'y', alpha=0.7, linewidth=2, label='Infected')
+  ax.plot(t, R, 'g', alpha=0.7, linewidth=2, label='Recovered')
+
+  ax.set_xlabel(f"Time ({time_label})", labelpad=10)
+  ax.set_ylabel('Population (%)', labelpad=10)
+
+  ax.yaxis.set_tick_params(length=0)
+  ax.xaxis.set_tick_params(length=0)
+
+  ax.grid(b=True, which='major', c='w', lw=2, ls='-')
+
+  legend = ax.legend()
+  legend.get_frame().set_alpha(0.5)
+
+  for spine in ('top', 'right', 'bottom', 'left'):
+      ax.spines[spine].set_visible(False)
+
+  plt.show()
@@ -1,6 +1,3 @@
-from scipy.integrate import odeint
-
-import matplotlib.pyplot as plt
 import numpy as np
 
 def suscetibles_derivative(compartments, beta, gamma):
@@ -25,6 +22,9 @@ def simulate_sir_epidemics(infected_people_per_day, infection_duration, days_of_
     beta = infected_people_per_day
     gamma = 1.0 / infection_duration
 
+    # imported here to keep scipy out of the import path of modules that never integrate (e.g. solver workers)
+    from scipy.integrate import odeint
+
     t = np.linspace(0, days_of_simulation - 1, days_of_simulation)
 
     # solve ODEs
@@ -35,24 +35,41 @@ def simulate_sir_epidemics(infected_people_per_day, infection_duration, days_of_
 
     return t, S, I, R
 
-def plot_sir(t, S, I, R, time_label='days'):
-  f, ax = plt.subplots(1,1,figsize=(10,4))
-  ax.plot(t, S, 'b', alpha=0.7, linewidth=2, label='Susceptible')
-  ax.plot(t, I, 'y', alpha=0.7, linewidth=2, label='Infected')
-  ax.plot(t, R, 'g', alpha=0.7, linewidth=2, label='Recovered')
+def simulate_sir_epidemics_batch(infected_people_per_day, infection_duration, days_of_simulation, initial_states):
+    """Simulates several epidemics at once, integrating all of them as a single ODE system.
+    Parameters:
+    infected_people_per_day (float or array): beta of all epidemics or of each one
+    infection_duration (float or array): infection duration (1 / gamma) of all epidemics or of each one
+    days_of_simulation (int): number of simulated days (including the initial one)
+    initial_states (array): array with shape (M, 3) with the initial (S, I, R) of each epidemic
+    Returns:
+    S, I, R (arrays): arrays with shape (M,) with the compartments of each epidemic on the last day
+    """
+    from scipy.integrate import odeint
+
+    initial_states = np.asarray(initial_states, dtype=float)
+    number_of_epidemics = initial_states.shape[0]
+
+    beta = np.broadcast_to(np.asarray(infected_people_per_day, dtype=float), (number_of_epidemics,))
+    gamma = np.broadcast_to(1.0 / np.asarray(infection_duration, dtype=float), (number_of_epidemics,))
 
-  ax.set_xlabel(f"Time ({time_label})", labelpad=10)
-  ax.set_ylabel('Population (%)', labelpad=10)
+    # compartments of each epidemic are kept side by side, so the jacobian is banded (one diagonal above and one
+    # below the main one) and the stiff solver never builds a dense (3M, 3M) matrix
+    def derivative(flattened_compartments, t):
+        dSdt, dIdt, dRdt = compartments_derivative(flattened_compartments.reshape(( number_of_epidemics, 3 )).T, beta, gamma)
+        return np.stack((dSdt, dIdt, dRdt), axis=1).ravel()
 
-  ax.yaxis.set_tick_params(length=0)
-  ax.xaxis.set_tick_params(length=0)
+    t = np.array([ 0.0, days_of_simulation - 1.0 ])
 
-  ax.grid(b=True, which='major', c='w', lw=2, ls='-')
+    ret = odeint(derivative, initial_states.ravel(), t, ml=1, mu=1)
+    S, I, R = ret[-1].reshape(( number_of_epidemics, 3 )).T
 
-  legend = ax.legend()
-  legend.get_frame().set_alpha(0.5)
+    return S, I, R
 
-  for spine in ('top', 'right', 'bottom', 'left'):
-      ax.spines[spine].set_visible(False)
+def __getattr__(name):
+    # plot_sir lives in sir_modelling.plotting, loaded only when requested to avoid importing matplotlib
+    if name == "plot_sir":
+        from sir_modelling.plotting import plot_sir
+        return plot_sir
 
-  plt.show()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
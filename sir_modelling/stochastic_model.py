@@ -0,0 +1,109 @@
+from scipy.sparse import csr_matrix
+
+import numpy as np
+
+from mdp.policy_lookup import approximate_points
+from mdp.simplex_grid import lattice_points, lattice_ranks, lattice_size
+from sir_modelling.base_model import default_reward_function, enumerate_states
+from sir_modelling.enumerative_model import MDP, get_human_readable_states, get_state_lattice_points
+from sir_modelling.simulation import simulate_sir_epidemics_batch
+
+def lognormal_parameter_sampler(beta_deviation = 0.1, gamma_deviation = 0.1):
+    """Returns a sampler that multiplies beta and gamma by independent log-normal noises with the given deviations."""
+    def sample_parameters(beta, gamma, shape, random_generator):
+        sampled_betas = beta * random_generator.lognormal(0.0, beta_deviation, size=shape)
+        sampled_gammas = gamma * random_generator.lognormal(0.0, gamma_deviation, size=shape)
+        return sampled_betas, sampled_gammas
+
+    return sample_parameters
+
+def enumerate_stochastic_transitions(approximation_threshold, beta, gamma, state_ids, steps_per_transition, samples,
+                                     parameter_sampler, random_generator, chunk_size):
+    """Returns the successor distribution of every state for a beta as (from_ids, to_ids, probabilities) arrays.
+    States are grid ranks (see mdp.simplex_grid.lattice_ranks) and state_ids maps a rank to a state id."""
+    precision = int(round(1.0 / approximation_threshold))
+    number_of_states = lattice_size(precision, 3)
+
+    from_ids = []
+    to_ids = []
+    probabilities = []
+
+    for start in range(0, number_of_states, chunk_size):
+        stop = min(start + chunk_size, number_of_states)
+
+        # every state of the chunk is repeated once per parameter draw
+        states = np.repeat(lattice_points(start, stop, precision, 3) * approximation_threshold, samples, axis=0)
+        sampled_betas, sampled_gammas = parameter_sampler(beta, gamma, len(states), random_generator)
+
+        next_states = simulate_sir_epidemics_batch(sampled_betas, 1.0 / sampled_gammas, steps_per_transition + 1, states)
+        next_points = np.clip(approximate_points(np.stack(next_states, axis=1), precision), 0, precision)
+
+        # histogram of (from, to) pairs
+        from_ranks = np.repeat(np.arange(start, stop, dtype=np.int64), samples)
+        pairs, counts = np.unique(from_ranks * number_of_states + lattice_ranks(next_points, precision), return_counts=True)
+
+        from_ids.append(state_ids[pairs // number_of_states])
+        to_ids.append(state_ids[pairs % number_of_states])
+        probabilities.append(counts / samples)
+
+    return np.concatenate(from_ids), np.concatenate(to_ids), np.concatenate(probabilities)
+
+def create_stochastic_representation(approximation_threshold, gamma, betas, steps_per_transition = 1, reward_function = None,
+                                     samples = 32, parameter_sampler = None, seed = None, chunk_size = 2000):
+    """Creates the SIR enumerative representation with uncertain beta and gamma. For each (state, beta), samples
+    parameter draws are integrated in one batched solve, the end states are snapped to the grid and counted, so the
+    transitions are distributions over the successor states.
+    Parameters:
+    approximation_threshold (float): size of each grid division
+    gamma (float): recovery rate of the SIR model (mean of its draws)
+    betas (list of float): infection rates, the actions of the mdp (mean of the draws of each one)
+    steps_per_transition (int): number of simulated days for each transition
+    reward_function (function): same as in base_model.create_representation, but receiving numpy arrays
+    samples (int): number of parameter draws for each (state, beta)
+    parameter_sampler (function): function that receives beta, gamma, a number of draws and a numpy random generator and
+                                  returns arrays with the drawn betas and gammas (defaults to
+                                  lognormal_parameter_sampler())
+    seed (int): optional seed used to initialize random number generator
+    chunk_size (int): number of states integrated at once (each one with samples draws)
+    Returns:
+    mdp (EnumerativeMDP): representation with the same states as enumerative_model.create_representation, whose
+                          transition matrices are scipy.sparse CSR matrices
+    """
+    if reward_function is None:
+        reward_function = default_reward_function
+
+    if parameter_sampler is None:
+        parameter_sampler = lognormal_parameter_sampler()
+
+    random_generator = np.random.default_rng(seed)
+
+    human_readable_states = get_human_readable_states(enumerate_states(approximation_threshold), approximation_threshold)
+    number_of_states = len(human_readable_states)
+
+    # state ids follow the human readable states order, so map grid ranks to them
+    points, precision = get_state_lattice_points(human_readable_states)
+    state_ids = np.zeros(number_of_states, dtype=np.int64)
+    state_ids[lattice_ranks(points, precision)] = np.arange(number_of_states)
+
+    susceptibles, infective, recovered = (points * approximation_threshold).T
+
+    transition_matrix_per_beta = {}
+    reward_matrix_per_beta = {}
+
+    for beta in betas:
+        from_ids, to_ids, probabilities = enumerate_stochastic_transitions(
+            approximation_threshold, beta, gamma, state_ids, steps_per_transition, samples, parameter_sampler,
+            random_generator, chunk_size
+        )
+
+        transition_matrix_per_beta[beta] = csr_matrix((probabilities, (from_ids, to_ids)), shape=(number_of_states, number_of_states))
+
+        rewards = reward_function(susceptibles, infective, recovered, beta) / approximation_threshold
+        reward_matrix_per_beta[beta] = np.asarray(rewards, dtype=float).reshape(( number_of_states, 1 ))
+
+    return MDP(
+        states = human_readable_states,
+        actions = betas,
+        transition_matrix = lambda action: transition_matrix_per_beta[action],
+        reward_matrix = lambda action: reward_matrix_per_beta[action]
+    )
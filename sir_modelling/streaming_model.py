@@ -0,0 +1,121 @@
+from collections import namedtuple
+
+import json
+import os
+
+import numpy as np
+
+from mdp.policy_lookup import PolicyLookup, approximate_points
+from mdp.simplex_grid import LatticeIndex, lattice_points, lattice_points_at, lattice_ranks, lattice_size
+from sir_modelling.base_model import default_reward_function
+from sir_modelling.simulation import simulate_sir_epidemics_batch
+
+StreamedMDP = namedtuple("StreamedMarkovDecisionProcess", ["directory", "actions", "approximation_threshold", "successors", "rewards"])
+
+def build_streaming_representation(directory, approximation_threshold, gamma, betas, steps_per_transition = 1,
+                                   reward_function = None, chunk_size = 100000):
+    """Builds the SIR enumerative representation directly on disk, so grids larger than the memory can be modelled.
+    States are the lattice points in the order of base_model.enumerate_states (a state id is its position in that
+    order, see mdp.simplex_grid.lattice_points). The lattice is generated in chunks, each chunk is integrated at once
+    for every beta and its successor ids and rewards are written to memory mapped .npy files, so the peak memory is
+    bounded by chunk_size. Transitions are deterministic (probability 1.0), as in base_model.
+    Parameters:
+    directory (string): directory where the representation is written
+    approximation_threshold (float): size of each grid division
+    gamma (float): recovery rate of the SIR model
+    betas (list of float): infection rates, the actions of the mdp
+    steps_per_transition (int): number of simulated days for each transition
+    reward_function (function): same as in base_model.create_representation, but receiving numpy arrays
+    chunk_size (int): number of states handled at once
+    Returns:
+    mdp (StreamedMDP): representation with successors and rewards memory mapped as arrays with shape (actions, states)
+    """
+    if reward_function is None:
+        reward_function = default_reward_function
+
+    os.makedirs(directory, exist_ok=True)
+
+    precision = int(round(1.0 / approximation_threshold))
+    number_of_states = lattice_size(precision, 3)
+
+    successors = np.lib.format.open_memmap(os.path.join(directory, "successors.npy"), mode="w+",
+                                           dtype=np.min_scalar_type(number_of_states), shape=(len(betas), number_of_states))
+    rewards = np.lib.format.open_memmap(os.path.join(directory, "rewards.npy"), mode="w+",
+                                        dtype=np.float64, shape=(len(betas), number_of_states))
+
+    for start in range(0, number_of_states, chunk_size):
+        stop = min(start + chunk_size, number_of_states)
+
+        states = lattice_points(start, stop, precision, 3) * approximation_threshold
+
+        for action_index, beta in enumerate(betas):
+            next_states = simulate_sir_epidemics_batch(beta, 1.0 / gamma, steps_per_transition + 1, states)
+            next_points = np.clip(approximate_points(np.stack(next_states, axis=1), precision), 0, precision)
+
+            successors[action_index, start:stop] = lattice_ranks(next_points, precision)
+
+    write_rewards(rewards, approximation_threshold, betas, reward_function, chunk_size)
+
+    successors.flush()
+    rewards.flush()
+    del successors, rewards
+
+    with open(os.path.join(directory, "metadata.json"), "w") as metadata_file:
+        json.dump({
+            "approximation_threshold": approximation_threshold,
+            "gamma": gamma,
+            "betas": list(betas),
+            "steps_per_transition": steps_per_transition
+        }, metadata_file)
+
+    return load_streaming_representation(directory)
+
+def write_rewards(rewards, approximation_threshold, betas, reward_function, chunk_size):
+    precision = int(round(1.0 / approximation_threshold))
+
+    for start in range(0, rewards.shape[1], chunk_size):
+        stop = min(start + chunk_size, rewards.shape[1])
+        susceptibles, infective, recovered = (lattice_points(start, stop, precision, 3) * approximation_threshold).T
+
+        for action_index, beta in enumerate(betas):
+            rewards[action_index, start:stop] = reward_function(susceptibles, infective, recovered, beta) / approximation_threshold
+
+def with_reward_function(mdp, reward_function, directory = None, chunk_size = 100000):
+    """Returns a copy of a streamed mdp with the rewards of another reward function, so models that only differ on
+    rewards share their successors (the expensive part to build). Rewards are computed in chunks and written to
+    directory/rewards.npy when it is informed (kept in memory otherwise)."""
+    shape = mdp.rewards.shape
+
+    if directory is None:
+        rewards = np.zeros(shape)
+    else:
+        os.makedirs(directory, exist_ok=True)
+        rewards = np.lib.format.open_memmap(os.path.join(directory, "rewards.npy"), mode="w+", dtype=np.float64, shape=shape)
+
+    write_rewards(rewards, mdp.approximation_threshold, mdp.actions, reward_function, chunk_size)
+
+    return mdp._replace(rewards=rewards)
+
+def load_streaming_representation(directory):
+    """Loads a representation written by build_streaming_representation, memory mapping its arrays."""
+    with open(os.path.join(directory, "metadata.json")) as metadata_file:
+        metadata = json.load(metadata_file)
+
+    return StreamedMDP(
+        directory = directory,
+        actions = metadata["betas"],
+        approximation_threshold = metadata["approximation_threshold"],
+        successors = np.load(os.path.join(directory, "successors.npy"), mmap_mode="r"),
+        rewards = np.load(os.path.join(directory, "rewards.npy"), mmap_mode="r")
+    )
+
+def get_state_numeric_values(mdp, state_ids):
+    """Returns an array with shape (len(state_ids), 3) with the (S, I, R) values of state ids of a streamed mdp."""
+    precision = int(round(1.0 / mdp.approximation_threshold))
+    return lattice_points_at(state_ids, precision, 3) * mdp.approximation_threshold
+
+def create_policy_lookup(mdp, policy):
+    """Creates a PolicyLookup for a policy computed for a streamed mdp. State ids are lattice ranks, so observations are
+    resolved with a LatticeIndex and the lattice is never enumerated."""
+    precision = int(round(1.0 / mdp.approximation_threshold))
+    return PolicyLookup(policy, None, precision, grid_index=LatticeIndex(precision, 3))
@@ -0,0 +1,228 @@
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from functools import partial
+
+import hashlib
+import itertools
+import json
+import os
+import sqlite3
+import time
+
+from mdp.algorithms.value_iteration import streaming_finite_horizon_value_iteration
+from sir_modelling.streaming_model import build_streaming_representation, load_streaming_representation, with_reward_function
+
+# rewards do not change transitions, so they are applied when solving and every reward weighting shares the model build
+BUILD_PARAMETERS = [ "approximation_threshold", "betas", "steps_per_transition", "recovery_rate" ]
+SOLVE_PARAMETERS = [ "reward_weights", "gamma", "horizon" ]
+
+DEFAULT_PARAMETERS = {
+    "steps_per_transition": 1,
+    "recovery_rate": 1.0 / 4.0,
+    "reward_weights": (10, -15, 5),
+    "gamma": 0.9,
+    "horizon": 30
+}
+
+def weighted_reward(reward_weights, susceptibles, infective, recovered, beta):
+    susceptibles_weight, infective_weight, recovered_weight = reward_weights
+    return susceptibles_weight * susceptibles + infective_weight * infective + recovered_weight * recovered
+
+def expand_parameter_grid(parameter_grid):
+    """Expands a dict that maps each parameter to a list of values into the list of every configuration. Parameters
+    are the ones of BUILD_PARAMETERS and SOLVE_PARAMETERS, where betas are lists of betas, reward_weights are
+    (susceptibles, infective, recovered) weights of a linear reward and recovery_rate is the SIR gamma. Parameters
+    missing from the grid use DEFAULT_PARAMETERS."""
+    grid = dict(map(lambda item: (item[0], [ item[1] ]), DEFAULT_PARAMETERS.items()))
+    grid.update(parameter_grid)
+
+    names = BUILD_PARAMETERS + SOLVE_PARAMETERS
+    configurations = []
+
+    for values in itertools.product(*map(lambda name: grid[name], names)):
+        configuration = dict(zip(names, values))
+        configuration["betas"] = list(configuration["betas"])
+        configuration["reward_weights"] = list(configuration["reward_weights"])
+        configurations.append(configuration)
+
+    return configurations
+
+def get_key(configuration, parameters):
+    serialized = json.dumps([ configuration[name] for name in parameters ], sort_keys=True)
+    return hashlib.sha1(serialized.encode()).hexdigest()[:16]
+
+def build_task(directory, configuration):
+    build_streaming_representation(
+        directory,
+        configuration["approximation_threshold"],
+        configuration["recovery_rate"],
+        configuration["betas"],
+        configuration["steps_per_transition"]
+    )
+
+    return directory
+
+def solve_task(model_directory, policy_directory, configuration):
+    start_time = time.perf_counter()
+
+    mdp = load_streaming_representation(model_directory)
+    mdp = with_reward_function(mdp, partial(weighted_reward, configuration["reward_weights"]), policy_directory)
+    policy, value_function, statistics = streaming_finite_horizon_value_iteration(mdp, configuration["gamma"], configuration["horizon"])
+    policy.save(policy_directory)
+
+    statistics["elapsed_time"] = time.perf_counter() - start_time
+    return statistics
+
+class SweepStore:
+    """SQLite store of a sweep, with the status of each model build and the statistics of each finished run."""
+
+    def __init__(self, path):
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript("""
+            CREATE TABLE IF NOT EXISTS builds (
+                build_key TEXT PRIMARY KEY,
+                parameters TEXT NOT NULL,
+                path TEXT NOT NULL,
+                finished_at REAL
+            );
+            CREATE TABLE IF NOT EXISTS runs (
+                run_key TEXT PRIMARY KEY,
+                build_key TEXT NOT NULL,
+                parameters TEXT NOT NULL,
+                policy_path TEXT NOT NULL,
+                iterations INTEGER,
+                bellman_backups_done INTEGER,
+                elapsed_time REAL,
+                finished_at REAL
+            );
+        """)
+
+    def finished_builds(self):
+        return set(map(lambda row: row[0], self.connection.execute("SELECT build_key FROM builds")))
+
+    def finished_runs(self):
+        return set(map(lambda row: row[0], self.connection.execute("SELECT run_key FROM runs")))
+
+    def record_build(self, build_key, configuration, path):
+        parameters = json.dumps(dict(map(lambda name: (name, configuration[name]), BUILD_PARAMETERS)))
+
+        with self.connection:
+            self.connection.execute("INSERT OR REPLACE INTO builds VALUES (?, ?, ?, ?)", (build_key, parameters, path, time.time()))
+
+    def record_run(self, run_key, build_key, configuration, policy_path, statistics):
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO runs VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (run_key, build_key, json.dumps(configuration), policy_path, statistics["iterations"],
+                 statistics["bellman_backups_done"], statistics["elapsed_time"], time.time())
+            )
+
+    def results(self):
+        """Returns the finished runs as a list of dicts with the run configuration, policy path and statistics."""
+        results = []
+
+        rows = self.connection.execute("SELECT parameters, policy_path, iterations, bellman_backups_done, elapsed_time FROM runs")
+        for parameters, policy_path, iterations, bellman_backups_done, elapsed_time in rows:
+            result = json.loads(parameters)
+            result.update({
+                "policy_path": policy_path,
+                "iterations": iterations,
+                "bellman_backups_done": bellman_backups_done,
+                "elapsed_time": elapsed_time
+            })
+            results.append(result)
+
+        return results
+
+    def close(self):
+        self.connection.close()
+
+def run_sweep(directory, parameter_grid, workers = None):
+    """Runs a parameter sweep of the SIR enumerative model with finite horizon Value Iteration on a process pool.
+    Models are built once for every distinct build configuration (runs that only differ on reward weights, gamma or
+    horizon share them, rewards being applied when solving) with the out-of-core builder, and the solves of a model are
+    scheduled as soon as it is built. Policies are saved under directory, next to the rewards of their run (a memory
+    mapped file, so the rewards are never held in memory), and the statistics of each run are recorded in
+    directory/sweep.sqlite, so an interrupted sweep resumes where it stopped, skipping finished builds and runs. When a
+    task fails, the tasks not started yet are cancelled and the running ones are recorded as they finish before the
+    error is raised.
+    Finite horizon solves can not be warm started (H backups from a warm start are not the H-step values), so runs are
+    independent and spread over the pool, while mdp.algorithms.sweep.warm_started_sweep chains infinite horizon solves
+    of an in-memory mdp sequentially.
+    Parameters:
+    directory (string): directory of the sweep (models, policies and store)
+    parameter_grid (dict): dict that maps a parameter to the list of its values (see expand_parameter_grid)
+    workers (int): number of worker processes (defaults to the number of CPUs)
+    Returns:
+    results (list of dict): every finished run of the sweep store, with its configuration, policy path and statistics
+    """
+    os.makedirs(directory, exist_ok=True)
+    store = SweepStore(os.path.join(directory, "sweep.sqlite"))
+
+    try:
+        finished_builds = store.finished_builds()
+        finished_runs = store.finished_runs()
+
+        runs_per_build = {}
+        build_configurations = {}
+
+        for configuration in expand_parameter_grid(parameter_grid):
+            run_key = get_key(configuration, BUILD_PARAMETERS + SOLVE_PARAMETERS)
+            if run_key in finished_runs:
+                continue
+
+            build_key = get_key(configuration, BUILD_PARAMETERS)
+            build_configurations[build_key] = configuration
+            runs_per_build.setdefault(build_key, []).append((run_key, configuration))
+
+        def model_directory(build_key):
+            return os.path.join(directory, "models", build_key)
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            pending = {}
+
+            def submit_runs(build_key):
+                for run_key, configuration in runs_per_build[build_key]:
+                    policy_path = os.path.join(directory, "policies", run_key)
+                    future = executor.submit(solve_task, model_directory(build_key), policy_path, configuration)
+                    pending[future] = ("run", build_key, run_key, configuration, policy_path)
+
+            for build_key, configuration in build_configurations.items():
+                if build_key in finished_builds:
+                    submit_runs(build_key)
+                else:
+                    future = executor.submit(build_task, model_directory(build_key), configuration)
+                    pending[future] = ("build", build_key, None, configuration, None)
+
+            errors = []
+
+            while len(pending) != 0:
+                done, _ = wait(list(pending.keys()), return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    task, build_key, run_key, configuration, policy_path = pending.pop(future)
+
+                    try:
+                        result = future.result()
+                    except Exception as error:
+                        # tasks not started yet are cancelled, while the running ones are drained and recorded
+                        if len(errors) == 0:
+                            for pending_future in list(pending.keys()):
+                                if pending_future.cancel():
+                                    pending.pop(pending_future)
+
+                        errors.append(error)
+                        continue
+
+                    if task == "build":
+                        store.record_build(build_key, configuration, result)
+                        if len(errors) == 0:
+                            submit_runs(build_key)
+                    else:
+                        store.record_run(run_key, build_key, configuration, policy_path, result)
+
+            if len(errors) != 0:
+                raise errors[0]
+
+        return store.results()
+    finally:
+        store.close()
@@ -0,0 +1,84 @@
+import unittest
+
+import numpy as np
+
+from mdp.algorithms.lrtdp import compute_heuristic, enumerative_multi_resolution_lrtdp, get_reachable_states
+from mdp.algorithms.value_iteration import compute_qualities, enumerative_value_iteration
+from sir_modelling.enumerative_model import create_representation, interpolate_value_function
+
+class TestAdmissibleHeuristic(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        betas = [ 0.5, 1.0, 2.5, 4 ]
+
+        cls.gamma = 0.95
+        cls.mdp = create_representation(0.05, 0.25, betas)
+        cls.coarse_mdp = create_representation(0.1, 0.25, betas)
+        cls.goal_state_indexes = [ index for index, state in enumerate(cls.mdp.states) if "_i_0_" in state ]
+
+    def backup(self, value_function):
+        backup = compute_qualities(self.mdp, self.gamma, value_function).max(axis=0).reshape(( len(self.mdp.states), 1 ))
+        backup[self.goal_state_indexes] = 0.0
+        return backup
+
+    def optimal_value_function(self):
+        value_function = np.zeros(( len(self.mdp.states), 1 ))
+        for _ in range(1000):
+            value_function = self.backup(value_function)
+        return value_function
+
+    def test_heuristic_is_an_upper_bound(self):
+        _, coarse_value_function, _ = enumerative_value_iteration(self.coarse_mdp, self.gamma, 0.01)
+        estimate = interpolate_value_function(self.coarse_mdp, coarse_value_function, self.mdp)
+
+        for bound_backups, heuristic_backups in [ (0, 0), (20, 0), (20, 50) ]:
+            heuristic, _ = compute_heuristic(self.mdp, self.gamma, estimate, self.goal_state_indexes, heuristic_backups,
+                                             True, bound_backups)
+
+            self.assertTrue(np.all(self.backup(heuristic) <= heuristic + 1e-6))
+            self.assertTrue(np.all(heuristic >= self.optimal_value_function() - 1e-6))
+
+    def test_raising_tightens_the_bound(self):
+        _, coarse_value_function, _ = enumerative_value_iteration(self.coarse_mdp, self.gamma, 0.01)
+        estimate = interpolate_value_function(self.coarse_mdp, coarse_value_function, self.mdp)
+
+        shifted_heuristic, _ = compute_heuristic(self.mdp, self.gamma, estimate, self.goal_state_indexes, 0, True, 0)
+        raised_heuristic, _ = compute_heuristic(self.mdp, self.gamma, estimate, self.goal_state_indexes, 0, True, 20)
+
+        self.assertLess(raised_heuristic.mean(), shifted_heuristic.mean())
+
+class TestMultiResolutionLRTDP(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        betas = [ 0.5, 1.0, 2.5, 4 ]
+
+        cls.gamma = 0.95
+        cls.mdp = create_representation(0.05, 0.25, betas)
+        cls.coarse_mdp = create_representation(0.1, 0.25, betas)
+        cls.goal_states = [ state for state in cls.mdp.states if "_i_0_" in state ]
+
+    def test_reachable_states_are_closed_under_the_transitions(self):
+        reachable_state_indexes = get_reachable_states(self.mdp, [ self.mdp.states.index("s_0_i_15_r_5") ])
+
+        for action in self.mdp.actions:
+            transition_matrix = self.mdp.transition_matrix(action)[reachable_state_indexes]
+            np.testing.assert_allclose(transition_matrix[:, reachable_state_indexes].sum(axis=1), 1.0)
+
+    def test_coarse_value_function_can_be_shared(self):
+        _, coarse_value_function, _ = enumerative_value_iteration(self.coarse_mdp, self.gamma, 0.01)
+
+        _, value_function, statistics = enumerative_multi_resolution_lrtdp(
+            self.mdp, self.coarse_mdp, interpolate_value_function, self.gamma, 100, 0.01, "s_0_i_15_r_5", self.goal_states, seed=0
+        )
+        _, shared_value_function, shared_statistics = enumerative_multi_resolution_lrtdp(
+            self.mdp, self.coarse_mdp, interpolate_value_function, self.gamma, 100, 0.01, "s_0_i_15_r_5", self.goal_states, seed=0,
+            coarse_value_function=coarse_value_function
+        )
+
+        np.testing.assert_allclose(shared_value_function, value_function)
+        self.assertGreater(statistics["coarse_bellman_backups_done"], 0)
+        self.assertEqual(shared_statistics["coarse_bellman_backups_done"], 0)
+        self.assertEqual(shared_statistics["heuristic_bellman_backups_done"], statistics["heuristic_bellman_backups_done"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+from multiprocessing import shared_memory
+from unittest import mock
+
+import unittest
+
+import numpy as np
+
+from mdp.algorithms.lrtdp import enumerative_lrtdp
+from mdp.algorithms.parallel_lrtdp import enumerative_parallel_lrtdp
+from mdp.algorithms.value_iteration import enumerative_value_iteration
+from sir_modelling.enumerative_model import create_representation
+
+class TestParallelLRTDP(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.gamma = 0.9
+        cls.epsilon = 0.01
+        cls.mdp = create_representation(0.05, 0.25, [ 0.5, 1.0, 2.5, 4 ])
+        cls.goal_states = [ state for state in cls.mdp.states if "_i_0_" in state ]
+        cls.initial_states = [ "s_19_i_1_r_0", "s_15_i_5_r_0", "s_0_i_15_r_5" ]
+        cls.initial_state_indexes = list(map(lambda state: cls.mdp.states.index(state), cls.initial_states))
+
+        _, optimal_value_function, _ = enumerative_value_iteration(cls.mdp, cls.gamma, 1e-6)
+        cls.optimal_value_function = np.asarray(optimal_value_function).reshape(( len(cls.mdp.states), 1 ))
+
+        # the optimal value function shifted up is an upper bound, so the epsilon guarantee of LRTDP holds
+        cls.heuristic = cls.optimal_value_function + 1.0
+
+        # a residual below epsilon bounds the error of the values by epsilon / (1 - gamma)
+        cls.tolerance = cls.epsilon / (1 - cls.gamma)
+
+    def test_values_match_sequential_lrtdp_and_value_iteration(self):
+        sequential_values = []
+        for initial_state in self.initial_states:
+            _, value_function, _ = enumerative_lrtdp(self.mdp, self.gamma, 100, self.epsilon, initial_state, self.goal_states,
+                                                     seed=0, initial_value_function=self.heuristic)
+            sequential_values.append(value_function[self.mdp.states.index(initial_state), 0])
+
+        for workers in [ 1, 2, 4 ]:
+            policy, value_function, statistics = enumerative_parallel_lrtdp(
+                self.mdp, self.gamma, 100, self.epsilon, self.initial_states, self.goal_states, workers=workers, seed=0,
+                initial_value_function=self.heuristic
+            )
+
+            values = value_function[self.initial_state_indexes, 0]
+
+            self.assertEqual(statistics["workers"], workers)
+            np.testing.assert_allclose(values, self.optimal_value_function[self.initial_state_indexes, 0], atol=self.tolerance)
+            np.testing.assert_allclose(values, sequential_values, atol=self.tolerance)
+
+    def test_worker_failure_raises_and_releases_shared_memory(self):
+        def failing_transition_matrix(action):
+            raise ValueError("transition matrix unavailable")
+
+        failing_mdp = self.mdp._replace(transition_matrix=failing_transition_matrix)
+
+        memory_names = []
+        shared_memory_class = shared_memory.SharedMemory
+
+        def recording_shared_memory(*args, **kwargs):
+            memory = shared_memory_class(*args, **kwargs)
+            memory_names.append(memory.name)
+            return memory
+
+        with mock.patch("mdp.algorithms.parallel_lrtdp.shared_memory.SharedMemory", side_effect=recording_shared_memory):
+            with self.assertRaises(RuntimeError):
+                enumerative_parallel_lrtdp(failing_mdp, self.gamma, 100, self.epsilon, self.initial_states, self.goal_states,
+                                           workers=2, seed=0)
+
+        self.assertEqual(len(memory_names), 2)
+        for memory_name in memory_names:
+            with self.assertRaises(FileNotFoundError):
+                shared_memory.SharedMemory(name=memory_name)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,180 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from mdp.algorithms.value_iteration import enumerative_finite_horizon_value_iteration, enumerative_value_iteration
+from mdp.policy import NonStationaryPolicy, Policy
+from sir_modelling.enumerative_model import create_policy_lookup, create_representation, get_state_lattice_points
+from sir_modelling.enumerative_model_simulation import simulate_policy_with_mdp_model
+
+class TestPolicy(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.mdp = create_representation(0.1, 0.25, [ 0.5, 1.0, 2.5, 4 ])
+        cls.policy, cls.value_function, _ = enumerative_value_iteration(cls.mdp, 0.9, 0.01)
+
+        # the dict policy of the old solvers
+        cls.dict_policy = dict(map(lambda state: (state, cls.policy[state]), cls.mdp.states))
+
+    def test_behaves_as_a_dict(self):
+        self.assertEqual(len(self.policy), len(self.mdp.states))
+        self.assertEqual(list(self.policy), self.mdp.states)
+        self.assertEqual(dict(self.policy.items()), self.dict_policy)
+        self.assertEqual(self.policy, self.dict_policy)
+
+        self.assertIn(self.mdp.states[0], self.policy)
+        self.assertNotIn("s_0_i_0_r_0", self.policy)
+        self.assertIsNone(self.policy.get("s_0_i_0_r_0"))
+        with self.assertRaises(KeyError):
+            self.policy["s_0_i_0_r_0"]
+
+        for state_id, state in enumerate(self.mdp.states):
+            self.assertEqual(self.policy.state_id(state), state_id)
+            self.assertEqual(self.policy.value(state), self.value_function[state_id, 0])
+
+    def test_unsorted_states_are_found(self):
+        states = [ "c", "a", "b" ]
+        policy = Policy(states, [ 0.5, 1.0 ], [ 0, 1, 1 ])
+
+        self.assertEqual(list(policy), states)
+        self.assertEqual(dict(policy.items()), { "c": 0.5, "a": 1.0, "b": 1.0 })
+
+    def test_from_dict_round_trip(self):
+        value_function = dict(map(lambda item: (item[1], self.value_function[item[0]]), enumerate(self.mdp.states)))
+        policy = Policy.from_dict(self.dict_policy, self.mdp.actions, value_function)
+
+        self.assertEqual(policy, self.policy)
+        np.testing.assert_array_equal(policy.action_indexes, self.policy.action_indexes)
+        np.testing.assert_allclose(policy.value_function, self.value_function[:, 0])
+
+        # actions default to the sorted actions found in the dict
+        self.assertEqual(Policy.from_dict({ "a": 2.5, "b": 0.5 }).actions, [ 0.5, 2.5 ])
+
+    def test_save_and_load(self):
+        with tempfile.TemporaryDirectory() as directory:
+            self.policy.save(directory)
+
+            for mmap_mode in [ None, "r" ]:
+                policy = Policy.load(directory, mmap_mode=mmap_mode)
+
+                # arrays mapped in read only mode are views over the files, not copies
+                self.assertEqual(policy.action_indexes.flags.writeable, mmap_mode is None)
+                self.assertEqual(policy.value_function.flags.writeable, mmap_mode is None)
+                self.assertEqual(isinstance(policy.states, np.memmap), mmap_mode is not None)
+                self.assertEqual(policy.actions, self.mdp.actions)
+                self.assertEqual(policy, self.dict_policy)
+                np.testing.assert_array_equal(policy.value_function, self.policy.value_function)
+
+                del policy
+
+    def test_policy_without_state_names(self):
+        policy = Policy(None, self.mdp.actions, self.policy.action_indexes)
+
+        self.assertEqual(len(policy), len(self.mdp.states))
+        self.assertEqual(policy.action_at(3), self.policy[self.mdp.states[3]])
+        self.assertNotIn(self.mdp.states[0], policy)
+        with self.assertRaises(TypeError):
+            iter(policy)
+
+    def test_repr(self):
+        self.assertTrue(repr(self.policy).startswith(f"Policy({{'{self.mdp.states[0]}': {self.policy[self.mdp.states[0]]!r}, "))
+        self.assertTrue(repr(self.policy).endswith(f"...}}, states={len(self.mdp.states)}, actions={self.mdp.actions})"))
+        self.assertEqual(repr(Policy(None, [ 0.5, 1.0 ], [ 0, 1 ])), "Policy(states=2, actions=[0.5, 1.0])")
+
+class TestNonStationaryPolicy(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.gamma = 0.9
+        cls.horizon = 8
+        cls.mdp = create_representation(0.1, 0.25, [ 0.5, 1.0, 2.5, 4 ])
+        cls.policy, cls.value_function, _ = enumerative_finite_horizon_value_iteration(cls.mdp, cls.gamma, cls.horizon,
+                                                                                       non_stationary=True, value_dtype=np.float64)
+
+    def test_rows_are_steps_from_the_start(self):
+        self.assertEqual(self.policy.horizon, self.horizon)
+        np.testing.assert_allclose(self.policy.value_table[0], self.value_function[:, 0])
+
+        # row t has horizon - t steps to go: its actions are greedy w.r.t the values of a solve with one step less
+        for step in range(self.horizon):
+            greedy_policy, _, _ = enumerative_finite_horizon_value_iteration(self.mdp, self.gamma, self.horizon - step - 1)
+            _, value_function, _ = enumerative_finite_horizon_value_iteration(self.mdp, self.gamma, self.horizon - step)
+
+            self.assertEqual(self.policy.at_step(step), greedy_policy)
+            np.testing.assert_array_equal(self.policy.action_table[step], greedy_policy.action_indexes)
+            np.testing.assert_allclose(self.policy.value_table[step], value_function[:, 0])
+
+        state = self.mdp.states[5]
+        self.assertEqual(self.policy.action(2, state), self.policy.at_step(2)[state])
+        self.assertEqual(self.policy.value(2, state), self.policy.value_table[2, 5])
+
+    def test_tables_are_written_to_the_directory_as_steps_finish(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "action_table.npy")
+            snapshots = []
+
+            # the rewards of the first action are read once at the start of each step
+            def reward_matrix(action):
+                if action == self.mdp.actions[0]:
+                    snapshots.append(np.load(path, mmap_mode="r").copy())
+                return self.mdp.reward_matrix(action)
+
+            policy, _, _ = enumerative_finite_horizon_value_iteration(self.mdp._replace(reward_matrix=reward_matrix), self.gamma,
+                                                                      self.horizon, non_stationary=True, value_dtype=np.float32,
+                                                                      directory=directory)
+
+            self.assertIsInstance(policy.action_table, np.memmap)
+            self.assertEqual(len(snapshots), self.horizon)
+
+            # steps are solved from the last row to the first one
+            for finished_steps, snapshot in enumerate(snapshots):
+                np.testing.assert_array_equal(snapshot[self.horizon - finished_steps:], self.policy.action_table[self.horizon - finished_steps:])
+
+            loaded_policy = NonStationaryPolicy.load(directory, mmap_mode="r")
+
+            np.testing.assert_array_equal(loaded_policy.action_table, self.policy.action_table)
+            np.testing.assert_allclose(loaded_policy.value_table, self.policy.value_table.astype(np.float32))
+            self.assertEqual(loaded_policy.value_table.dtype, np.float32)
+            self.assertEqual(list(loaded_policy.at_step(0)), self.mdp.states)
+
+            del policy, loaded_policy
+
+    def test_save_and_load(self):
+        with tempfile.TemporaryDirectory() as directory:
+            self.policy.save(directory)
+            loaded_policy = NonStationaryPolicy.load(directory)
+
+            np.testing.assert_array_equal(loaded_policy.action_table, self.policy.action_table)
+            np.testing.assert_array_equal(loaded_policy.value_table, self.policy.value_table)
+            self.assertEqual(loaded_policy.actions, self.policy.actions)
+            self.assertEqual(repr(self.policy), f"NonStationaryPolicy(horizon={self.horizon}, states={len(self.mdp.states)}, actions={self.mdp.actions})")
+
+    def test_simulation_follows_the_row_of_each_step(self):
+        # row t chooses the action t, so the chosen betas show the row used at each step
+        action_table = np.repeat(np.arange(self.horizon) % len(self.mdp.actions), len(self.mdp.states)).reshape(( self.horizon, len(self.mdp.states) ))
+        policy = NonStationaryPolicy(self.mdp.states, self.mdp.actions, action_table)
+
+        chosen_betas, S, I, R = simulate_policy_with_mdp_model(policy, "s_9_i_1_r_0", self.mdp, self.horizon, 0.1)
+
+        self.assertEqual(chosen_betas, list(map(lambda step: self.mdp.actions[step % len(self.mdp.actions)], range(self.horizon))))
+        self.assertEqual(len(S), self.horizon + 1)
+
+    def test_lookup_queries_the_row_of_a_step(self):
+        policy_lookup = create_policy_lookup(self.policy)
+        points, precision = get_state_lattice_points(self.mdp.states)
+
+        # grid points are the vertices of their own simplex (snapping them is subject to truncation errors)
+        observations = points / precision
+
+        for step in [ 0, 3, self.horizon - 1 ]:
+            actions, values = policy_lookup.query(observations, method="barycentric", step=step)
+
+            np.testing.assert_array_equal(actions, np.array(self.mdp.actions)[self.policy.action_table[step]])
+            np.testing.assert_allclose(values, self.policy.value_table[step])
+
+        with self.assertRaises(ValueError):
+            policy_lookup.query(observations, method="barycentric")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+import unittest
+
+import numpy as np
+
+from mdp.algorithms.lrtdp_simulator import get_state_lattice_points
+from mdp.algorithms.value_iteration import enumerative_value_iteration
+from mdp.policy import Policy
+from mdp.policy_lookup import PolicyLookup, truncate_points
+from sir_modelling.base_model import approximate_state
+from sir_modelling.enumerative_model import create_policy_lookup, create_representation, get_single_human_readable_state
+
+class TestEnumerativePolicyLookup(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.approximation_threshold = 0.05
+        cls.mdp = create_representation(cls.approximation_threshold, 0.25, [ 0.5, 1.0, 2.5, 4 ])
+        cls.policy, _, _ = enumerative_value_iteration(cls.mdp, 0.9, 0.01)
+        cls.policy_lookup = create_policy_lookup(cls.policy)
+        cls.observations = np.random.default_rng(0).dirichlet(np.ones(3), size=200)
+
+    def test_nearest_matches_approximate_state(self):
+        actions, values = self.policy_lookup.query(self.observations)
+
+        states = list(map(lambda observation: get_single_human_readable_state(approximate_state(observation, self.approximation_threshold),
+                                                                              self.approximation_threshold), self.observations))
+
+        np.testing.assert_array_equal(actions, list(map(lambda state: self.policy[state], states)))
+        np.testing.assert_array_equal(values, list(map(lambda state: self.policy.value(state), states)))
+
+    def test_observations_are_normalized(self):
+        # head counts of a population of 1000 people give the same answers as fractions
+        for method in [ "nearest", "barycentric" ]:
+            actions, values = self.policy_lookup.query(self.observations, method)
+            counted_actions, counted_values = self.policy_lookup.query(self.observations * 1000, method)
+
+            np.testing.assert_array_equal(counted_actions, actions)
+            np.testing.assert_allclose(counted_values, values)
+
+    def test_barycentric_interpolates_between_grid_values(self):
+        _, values = self.policy_lookup.query(self.observations, "barycentric")
+
+        self.assertFalse(np.any(np.isnan(values)))
+        self.assertTrue(np.all(values >= self.policy.value_function.min() - 1e-9))
+        self.assertTrue(np.all(values <= self.policy.value_function.max() + 1e-9))
+
+        with self.assertRaises(ValueError):
+            self.policy_lookup.query(self.observations, "cubic")
+
+class TestSparsePolicyLookup(unittest.TestCase):
+    def test_off_grid_observations_fall_back_to_nearest(self):
+        random_generator = np.random.default_rng(0)
+
+        # policies found with enumerative_lrtdp_with_simulator only have the truncated states visited by the trials
+        observations = random_generator.dirichlet(np.ones(4), size=50)
+        states = list(map(lambda observation: "_".join(map(lambda value: str(int(np.trunc(value * 10 ** 4))), observation)), observations))
+        points, precision = get_state_lattice_points(states)
+
+        policy = Policy(states, [ 1.8, 1.0 ], random_generator.integers(0, 2, size=len(states)), random_generator.normal(size=len(states)))
+        policy_lookup = PolicyLookup(policy, points, precision, snap=truncate_points)
+
+        # the last observation is far from every visited state
+        observations = np.concatenate([ observations, [ [ 0.25, 0.25, 0.25, 0.25 ] ] ])
+
+        nearest_actions, nearest_values = policy_lookup.query(observations, "nearest")
+        actions, values = policy_lookup.query(observations, "barycentric")
+
+        np.testing.assert_array_equal(nearest_actions[:-1], list(map(lambda state: policy[state], states)))
+        np.testing.assert_array_equal(nearest_values[:-1], policy.value_function)
+
+        np.testing.assert_array_equal(actions, nearest_actions)
+        np.testing.assert_array_equal(values, nearest_values)
+        self.assertTrue(np.isnan(actions[-1]) and np.isnan(values[-1]))
+
+if __name__ == "__main__":
+    unittest.main()
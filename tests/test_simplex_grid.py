@@ -0,0 +1,97 @@
+import itertools
+import unittest
+
+import numpy as np
+
+from mdp.simplex_grid import (LatticeIndex, SimplexGridIndex, barycentric_coordinates, interpolate, lattice_points,
+                              lattice_points_at, lattice_rank, lattice_ranks, lattice_size)
+from sir_modelling.base_model import enumerate_states
+
+def enumerate_lattice(precision, dimension):
+    points = [ point for point in itertools.product(range(precision + 1), repeat=dimension) if sum(point) == precision ]
+    return np.array(points, dtype=np.int64)
+
+class TestLatticeRanks(unittest.TestCase):
+    def test_lattice_size_counts_every_point(self):
+        for precision, dimension in [ (1, 3), (7, 3), (20, 3), (5, 4), (9, 4) ]:
+            self.assertEqual(lattice_size(precision, dimension), len(enumerate_lattice(precision, dimension)))
+
+    def test_ranks_follow_lexicographic_order(self):
+        for precision, dimension in [ (1, 3), (7, 3), (20, 3), (5, 4), (9, 4) ]:
+            points = enumerate_lattice(precision, dimension)
+            np.testing.assert_array_equal(lattice_ranks(points, precision), np.arange(len(points)))
+
+    def test_points_and_ranks_round_trip(self):
+        for precision, dimension in [ (1, 3), (7, 3), (20, 3), (50, 3), (5, 4), (12, 4) ]:
+            number_of_points = lattice_size(precision, dimension)
+            points = lattice_points(0, number_of_points, precision, dimension)
+
+            np.testing.assert_array_equal(points.sum(axis=1), precision)
+            np.testing.assert_array_equal(lattice_ranks(points, precision), np.arange(number_of_points))
+
+            ranks = np.random.default_rng(0).integers(0, number_of_points, size=50)
+            np.testing.assert_array_equal(lattice_ranks(lattice_points_at(ranks, precision, dimension), precision), ranks)
+
+    def test_scalar_rank_matches_vectorized_rank(self):
+        points = lattice_points(0, lattice_size(9, 4), 9, 4)
+        self.assertEqual(list(map(lambda point: lattice_rank(list(point), 9), points)), list(range(len(points))))
+
+    def test_chunks_match_enumerate_states(self):
+        approximation_threshold = 0.05
+        precision = 20
+
+        states = np.array(enumerate_states(approximation_threshold))
+        points = np.concatenate([ lattice_points(start, min(start + 40, len(states)), precision, 3) for start in range(0, len(states), 40) ])
+
+        np.testing.assert_allclose(points * approximation_threshold, states, atol=1e-9)
+
+class TestGridIndexes(unittest.TestCase):
+    def test_simplex_grid_index_finds_state_ids(self):
+        points = enumerate_lattice(10, 3)
+        state_ids = np.random.default_rng(0).permutation(len(points))
+        grid_index = SimplexGridIndex(points[state_ids], 10)
+
+        np.testing.assert_array_equal(grid_index.lookup(points[state_ids]), np.arange(len(points)))
+        np.testing.assert_array_equal(grid_index.lookup([ [ 11, 0, 0 ], [ -1, 5, 6 ], [ 3, 3, 3 ] ]), [ -1, -1, -1 ])
+
+    def test_lattice_index_matches_simplex_grid_index(self):
+        points = lattice_points(0, lattice_size(10, 3), 10, 3)
+        queries = np.concatenate([ points, [ [ 11, 0, 0 ], [ -1, 5, 6 ], [ 3, 3, 3 ] ] ])
+
+        np.testing.assert_array_equal(LatticeIndex(10, 3).lookup(queries), SimplexGridIndex(points, 10).lookup(queries))
+
+class TestBarycentricCoordinates(unittest.TestCase):
+    def setUp(self):
+        self.random_generator = np.random.default_rng(0)
+
+    def test_weights_reproduce_points(self):
+        for precision, dimension in [ (1, 3), (10, 3), (20, 4) ]:
+            points = self.random_generator.dirichlet(np.ones(dimension), size=200)
+            vertices, weights = barycentric_coordinates(points, precision)
+
+            self.assertTrue(np.all(weights >= -1e-12))
+            np.testing.assert_allclose(weights.sum(axis=1), 1.0)
+            np.testing.assert_array_equal(vertices.sum(axis=2), precision)
+            np.testing.assert_allclose((weights[:, :, np.newaxis] * vertices).sum(axis=1) / precision, points, atol=1e-12)
+
+    def test_interpolation_reproduces_grid_values(self):
+        precision = 10
+        points = lattice_points(0, lattice_size(precision, 3), precision, 3)
+        values = self.random_generator.normal(size=len(points))
+
+        interpolated_values = interpolate(values, SimplexGridIndex(points, precision), points / precision)
+
+        np.testing.assert_allclose(interpolated_values, values)
+
+    def test_interpolation_is_exact_for_linear_functions(self):
+        precision = 10
+        points = lattice_points(0, lattice_size(precision, 3), precision, 3)
+        linear_function = lambda fractions: fractions @ np.array([ 10.0, -15.0, 5.0 ])
+
+        queries = self.random_generator.dirichlet(np.ones(3), size=200)
+        interpolated_values = interpolate(linear_function(points / precision), SimplexGridIndex(points, precision), queries)
+
+        np.testing.assert_allclose(interpolated_values, linear_function(queries))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,32 @@
+import unittest
+
+import numpy as np
+
+from sir_modelling.enumerative_model import create_representation
+from sir_modelling.stochastic_model import create_stochastic_representation, lognormal_parameter_sampler
+
+class TestStochasticModel(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.betas = [ 0.5, 1.0, 2.5, 4 ]
+        cls.mdp = create_representation(0.05, 0.25, cls.betas)
+
+    def test_single_noiseless_sample_matches_deterministic_model(self):
+        stochastic_mdp = create_stochastic_representation(0.05, 0.25, self.betas, samples=1,
+                                                          parameter_sampler=lognormal_parameter_sampler(0.0, 0.0),
+                                                          seed=0, chunk_size=40)
+
+        self.assertEqual(stochastic_mdp.states, self.mdp.states)
+
+        for beta in self.betas:
+            np.testing.assert_array_equal(stochastic_mdp.transition_matrix(beta).toarray(), self.mdp.transition_matrix(beta))
+            np.testing.assert_allclose(stochastic_mdp.reward_matrix(beta), self.mdp.reward_matrix(beta))
+
+    def test_successor_distributions_sum_to_one(self):
+        stochastic_mdp = create_stochastic_representation(0.05, 0.25, self.betas, samples=16, seed=0)
+
+        for beta in self.betas:
+            np.testing.assert_allclose(np.asarray(stochastic_mdp.transition_matrix(beta).sum(axis=1)).ravel(), 1.0)
+
+if __name__ == "__main__":
+    unittest.main()
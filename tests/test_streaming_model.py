@@ -0,0 +1,67 @@
+import tempfile
+import unittest
+
+import numpy as np
+
+from mdp.algorithms.value_iteration import enumerative_finite_horizon_value_iteration, streaming_finite_horizon_value_iteration
+from mdp.simplex_grid import lattice_points
+from sir_modelling.enumerative_model import create_representation, get_single_human_readable_state
+from sir_modelling.streaming_model import build_streaming_representation, create_policy_lookup, with_reward_function
+
+class TestStreamingModel(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.approximation_threshold = 0.05
+        cls.betas = [ 0.5, 1.0, 2.5, 4 ]
+
+        cls.mdp = create_representation(cls.approximation_threshold, 0.25, cls.betas)
+
+        cls.directory = tempfile.TemporaryDirectory()
+        cls.streamed_mdp = build_streaming_representation(cls.directory.name, cls.approximation_threshold, 0.25, cls.betas, chunk_size=50)
+
+        # state index in the enumerative mdp of each streamed state id
+        points = lattice_points(0, cls.streamed_mdp.successors.shape[1], 20, 3) * cls.approximation_threshold
+        state_indexes = dict(map(lambda item: (item[1], item[0]), enumerate(cls.mdp.states)))
+        cls.state_indexes = np.array(list(map(lambda point: state_indexes[get_single_human_readable_state(point, cls.approximation_threshold)], points)))
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.directory.cleanup()
+
+    def test_transitions_and_rewards_match_enumerative_model(self):
+        for action_index, beta in enumerate(self.betas):
+            transition_matrix = self.mdp.transition_matrix(beta)[self.state_indexes]
+
+            np.testing.assert_array_equal(np.argmax(transition_matrix, axis=1), self.state_indexes[self.streamed_mdp.successors[action_index]])
+            np.testing.assert_array_equal(transition_matrix.max(axis=1), 1.0)
+            np.testing.assert_allclose(self.streamed_mdp.rewards[action_index], self.mdp.reward_matrix(beta)[self.state_indexes, 0])
+
+    def test_value_iteration_matches_enumerative_value_iteration(self):
+        policy, value_function, _ = enumerative_finite_horizon_value_iteration(self.mdp, 0.9, 30)
+        streamed_policy, streamed_value_function, _ = streaming_finite_horizon_value_iteration(self.streamed_mdp, 0.9, 30, chunk_size=70)
+
+        np.testing.assert_allclose(streamed_value_function, value_function[self.state_indexes, 0])
+        np.testing.assert_array_equal(streamed_policy.action_indexes, policy.action_indexes[self.state_indexes])
+
+    def test_reward_function_can_be_replaced(self):
+        reward_function = lambda susceptibles, infective, recovered, beta: 10 * susceptibles - 30 * infective - beta
+
+        with tempfile.TemporaryDirectory() as directory:
+            built_mdp = build_streaming_representation(directory, self.approximation_threshold, 0.25, self.betas, reward_function=reward_function)
+            np.testing.assert_allclose(with_reward_function(self.streamed_mdp, reward_function, chunk_size=50).rewards, built_mdp.rewards)
+
+    def test_policy_lookup_finds_streamed_states(self):
+        policy, _, _ = streaming_finite_horizon_value_iteration(self.streamed_mdp, 0.9, 30)
+        points = lattice_points(0, self.streamed_mdp.successors.shape[1], 20, 3)
+        policy_lookup = create_policy_lookup(self.streamed_mdp, policy)
+
+        np.testing.assert_array_equal(policy_lookup.grid_index.lookup(points), np.arange(len(points)))
+
+        # grid points are the vertices of their own simplex (snapping them is subject to truncation errors)
+        actions, values = policy_lookup.query(points / 20, method="barycentric")
+
+        np.testing.assert_array_equal(actions, np.array(self.betas)[policy.action_indexes])
+        np.testing.assert_allclose(values, policy.value_function)
+
+if __name__ == "__main__":
+    unittest.main()
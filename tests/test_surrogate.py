@@ -0,0 +1,50 @@
+import unittest
+
+import numpy as np
+
+from mdp.simplex_grid import lattice_points, lattice_size
+from seir_modelling.simulator import Simulator
+from seir_modelling.surrogate import FlowMapSurrogate
+
+class TestFlowMapSurrogate(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.r0_values = [ 1.8, 1.0 ]
+        cls.surrogate = FlowMapSurrogate(cls.r0_values, 7, precision=10)
+        cls.states = np.random.default_rng(0).dirichlet(np.ones(4), size=100)
+
+    def test_simulate_state_matches_simulate(self):
+        for action in self.r0_values:
+            next_states = self.surrogate.simulate(self.states, action)
+
+            for state, next_state in zip(self.states, next_states):
+                np.testing.assert_allclose(self.surrogate.simulate_state(tuple(state), action), next_state, atol=1e-12)
+
+    def test_lattice_points_are_reproduced(self):
+        points = lattice_points(0, lattice_size(10, 4), 10, 4)
+
+        for action in self.r0_values:
+            np.testing.assert_allclose(self.surrogate.simulate(points / 10, action), self.surrogate.flow_maps[action], atol=1e-12)
+            np.testing.assert_allclose(self.surrogate.flow_maps[action], self.surrogate.integrate(points / 10, action))
+
+    def test_error_decreases_with_precision(self):
+        fine_surrogate = FlowMapSurrogate(self.r0_values, 7, precision=20)
+
+        self.assertLess(fine_surrogate.validate(50), self.surrogate.validate(50))
+
+class TestSimulatorSurrogate(unittest.TestCase):
+    def test_surrogate_beyond_tolerance_is_rejected(self):
+        with self.assertRaises(ValueError):
+            Simulator((0.999, 0.0, 0.001, 0.0), [ 1.8, 1.0 ], 7, surrogate_precision=5, surrogate_tolerance=1e-3)
+
+    def test_surrogate_within_tolerance_simulates_actions(self):
+        simulator = Simulator((0.999, 0.0, 0.001, 0.0), [ 1.8, 1.0 ], 7, surrogate_precision=10, surrogate_tolerance=0.05)
+        exact_simulator = Simulator((0.999, 0.0, 0.001, 0.0), [ 1.8, 1.0 ], 7)
+
+        self.assertLessEqual(simulator.surrogate_error, 0.05)
+
+        for action in [ 1.8, 1.0 ]:
+            np.testing.assert_allclose(simulator.simulate_action(action), exact_simulator.simulate_action(action), atol=simulator.surrogate_error)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+import itertools
+import unittest
+
+import numpy as np
+
+from mdp.algorithms.sweep import order_configurations, transfer_value_function, warm_started_sweep
+from mdp.algorithms.value_iteration import enumerative_value_iteration
+from sir_modelling.enumerative_model import create_representation, interpolate_value_function
+
+class TestOrderConfigurations(unittest.TestCase):
+    def test_each_configuration_is_followed_by_its_nearest_neighbour(self):
+        configurations = [ { "gamma": gamma } for gamma in [ 0.9, 0.5, 0.8, 0.6, 0.95 ] ]
+
+        self.assertEqual(order_configurations(configurations), [ 0, 4, 2, 3, 1 ])
+
+    def test_parameters_are_normalized_by_their_range(self):
+        # gamma varies little in absolute terms, but it spans its whole range as much as the horizon does
+        configurations = [
+            { "gamma": 0.9, "horizon": 10, "betas": [ 0.5, 1.0 ] },
+            { "gamma": 0.99, "horizon": 10, "betas": [ 0.5, 1.0 ] },
+            { "gamma": 0.9, "horizon": 100, "betas": [ 0.5, 1.0 ] },
+            { "gamma": 0.9, "horizon": 20, "betas": [ 0.5, 2.5 ] },
+            { "gamma": 0.9, "horizon": 20, "betas": [ 0.5, 1.0 ] }
+        ]
+
+        self.assertEqual(order_configurations(configurations), [ 0, 4, 3, 2, 1 ])
+
+    def test_custom_distance(self):
+        configurations = [ { "gamma": gamma } for gamma in [ 0.9, 0.5, 0.8, 0.6, 0.95 ] ]
+        reversed_distance = lambda first, second: -abs(first["gamma"] - second["gamma"])
+
+        self.assertEqual(order_configurations(configurations, reversed_distance), [ 0, 1, 4, 3, 2 ])
+        self.assertEqual(order_configurations([]), [])
+
+class TestWarmStartedSweep(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        betas = [ 0.5, 1.0, 2.5, 4 ]
+
+        cls.epsilon = 0.001
+        cls.mdps = dict(map(lambda threshold: (threshold, create_representation(threshold, 0.25, betas)), [ 0.1, 0.05 ]))
+        cls.configurations = [
+            { "approximation_threshold": approximation_threshold, "gamma": gamma }
+            for approximation_threshold, gamma in itertools.product([ 0.1, 0.05 ], [ 0.9, 0.93, 0.95 ])
+        ]
+
+    def build_mdp(self, configuration):
+        return self.mdps[configuration["approximation_threshold"]]
+
+    def solve(self, configuration, mdp, initial_value_function):
+        return enumerative_value_iteration(mdp, configuration["gamma"], self.epsilon, initial_value_function)
+
+    def test_transfer_rescales_values_between_discount_factors(self):
+        mdp = self.mdps[0.05]
+        value_function = np.arange(len(mdp.states), dtype=float)
+
+        transferred_value_function = transfer_value_function(mdp, value_function, mdp, 0.9, 0.95)
+
+        np.testing.assert_allclose(transferred_value_function[:, 0], value_function * 2)
+
+    def test_transfer_interpolates_between_grids(self):
+        coarse_mdp = self.mdps[0.1]
+        mdp = self.mdps[0.05]
+        _, coarse_value_function, _ = enumerative_value_iteration(coarse_mdp, 0.9, self.epsilon)
+
+        np.testing.assert_allclose(transfer_value_function(coarse_mdp, coarse_value_function, mdp, 0.9, 0.95, interpolate_value_function),
+                                   interpolate_value_function(coarse_mdp, coarse_value_function, mdp) * 2)
+
+        # without interpolation, states are matched by name (e.g. s_10_i_0_r_0 on the coarse grid is s_20_i_0_r_0)
+        self.assertTrue(np.all(transfer_value_function(coarse_mdp, coarse_value_function, mdp) == 0))
+
+    def test_warm_started_sweep_matches_independent_solves(self):
+        results, statistics = warm_started_sweep(self.configurations, self.build_mdp, self.solve,
+                                                 interpolate_value_function=interpolate_value_function)
+
+        independent_results = list(map(lambda configuration: self.solve(configuration, self.build_mdp(configuration), None), self.configurations))
+
+        self.assertEqual(statistics["order"], order_configurations(self.configurations))
+        self.assertLess(statistics["bellman_backups_done"], sum(map(lambda result: result[2]["bellman_backups_done"], independent_results)))
+
+        # both value functions are within epsilon / (1 - gamma) of the optimal one
+        for configuration, result, independent_result in zip(self.configurations, results, independent_results):
+            np.testing.assert_allclose(result[1], independent_result[1], atol=2 * self.epsilon / (1 - configuration["gamma"]))
+            self.assertEqual(result[0], independent_result[0])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+import os
+import tempfile
+import unittest
+
+from sir_modelling.sweep_runner import SweepStore, run_sweep
+
+class TestSweepRunner(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def finished_at(self):
+        store = SweepStore(os.path.join(self.directory.name, "sweep.sqlite"))
+        try:
+            return dict(store.connection.execute("SELECT run_key, finished_at FROM runs"))
+        finally:
+            store.close()
+
+    def test_runs_that_only_differ_on_rewards_share_the_model(self):
+        parameter_grid = {
+            "approximation_threshold": [ 0.1 ],
+            "betas": [ [ 0.5, 1.0 ] ],
+            "reward_weights": [ [ 10, -15, 5 ], [ 10, -30, 5 ] ],
+            "gamma": [ 0.9, 0.95 ],
+            "horizon": [ 5 ]
+        }
+
+        results = run_sweep(self.directory.name, parameter_grid, workers=2)
+
+        self.assertEqual(len(results), 4)
+        self.assertEqual(len(os.listdir(os.path.join(self.directory.name, "models"))), 1)
+
+        # each run solves its own rewards, memory mapped next to its policy
+        for result in results:
+            self.assertTrue(os.path.exists(os.path.join(result["policy_path"], "rewards.npy")))
+            self.assertTrue(os.path.exists(os.path.join(result["policy_path"], "action_indexes.npy")))
+
+        self.assertEqual(len(set(map(lambda result: result["policy_path"], results))), 4)
+
+    def test_resumed_sweep_skips_finished_runs(self):
+        parameter_grid = { "approximation_threshold": [ 0.1 ], "betas": [ [ 0.5, 1.0 ] ], "gamma": [ 0.9 ], "horizon": [ 5 ] }
+
+        run_sweep(self.directory.name, parameter_grid, workers=1)
+        finished_at = self.finished_at()
+
+        parameter_grid["gamma"] = [ 0.9, 0.95 ]
+        results = run_sweep(self.directory.name, parameter_grid, workers=1)
+        resumed_finished_at = self.finished_at()
+
+        self.assertEqual(len(results), 2)
+        self.assertEqual(len(os.listdir(os.path.join(self.directory.name, "models"))), 1)
+
+        for run_key, run_finished_at in finished_at.items():
+            self.assertEqual(resumed_finished_at[run_key], run_finished_at)
+
+    def test_failed_sweep_records_finished_runs_and_resumes(self):
+        # runs without betas fail when solved
+        parameter_grid = { "approximation_threshold": [ 0.1 ], "betas": [ [ 0.5, 1.0 ], [] ], "gamma": [ 0.9, 0.95 ], "horizon": [ 5 ] }
+
+        with self.assertRaises(ValueError):
+            run_sweep(self.directory.name, parameter_grid, workers=1)
+
+        finished_at = self.finished_at()
+        # with a single worker tasks run in submission order, so the runs of the first model finish before the failure
+        self.assertEqual(len(finished_at), 2)
+
+        parameter_grid["betas"] = [ [ 0.5, 1.0 ] ]
+        results = run_sweep(self.directory.name, parameter_grid, workers=1)
+        resumed_finished_at = self.finished_at()
+
+        self.assertEqual(len(results), 2)
+        for run_key, run_finished_at in finished_at.items():
+            self.assertEqual(resumed_finished_at[run_key], run_finished_at)
+
+if __name__ == "__main__":
+    unittest.main()